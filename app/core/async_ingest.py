@@ -0,0 +1,524 @@
+# app/core/async_ingest.py
+# One asyncio event loop, in one background thread, tails every file and
+# runs the local syslog-style receivers. All of it lands in the same
+# IngestQueue the UI (or headless runner) drains.
+import asyncio
+import concurrent.futures
+import os
+import re
+import socket
+import stat
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+
+from core.metrics import metrics
+from core.monitor import InotifyBackend, LogMonitor, create_backend
+from utils.constants import (
+    CHECKPOINT_INTERVAL,
+    HISTORY_LINES,
+    MAX_MESSAGE_SIZE,
+    POLL_INTERVAL,
+    RECEIVER_QUEUE_SIZE,
+)
+
+# Syslog severity (PRI & 7) -> level: emerg/alert/crit, err, warning, notice/info/debug
+SYSLOG_LEVELS = ("CRITICAL", "CRITICAL", "CRITICAL", "ERROR", "WARNING", "INFO", "INFO", "INFO")
+REPLAY_BLOCK = 5000  # history/archive lines handed over per queue item
+HANDOFF_SLICE = 1000  # lines per push_many; bounds the block policy's overshoot
+
+_PRI = re.compile(r"<(\d{1,3})>(?:1 )?")        # RFC 3164 "<13>", RFC 5424 "<13>1 "
+_OCTET_FRAME = re.compile(rb"\d{1,6} <")         # RFC 6587 octet counting: "LEN <PRI>..."
+
+
+def syslog_line(message):
+    # b"<11>Jan  2 10:00:00 host app: boom" -> "[ERROR] Jan  2 10:00:00 host app: boom";
+    # anything without a PRI header is passed through for the normal parser
+    text = message.decode("utf-8", errors="replace").strip()
+    if text[:1] != "<":
+        return text
+    match = _PRI.match(text)
+    if match is None:
+        return text
+    return f"[{SYSLOG_LEVELS[int(match.group(1)) & 7]}] {text[match.end():]}"
+
+
+def split_octet_frames(data):
+    # Returns (messages, remainder) for a stream of "LEN <PRI>msg" frames
+    messages, pos, size = [], 0, len(data)
+    while pos < size:
+        if data[pos] in b"\r\n ":
+            pos += 1
+            continue
+        space = data.find(b" ", pos, pos + 8)
+        if space < 0 or not data[pos:space].isdigit():
+            # Lost the framing: resynchronise on the next newline
+            newline = data.find(b"\n", pos)
+            if newline < 0:
+                break
+            messages.append(data[pos:newline])
+            pos = newline + 1
+            continue
+        end = space + 1 + int(data[pos:space])
+        if end > size:
+            break
+        messages.append(data[space + 1:end])
+        pos = end
+    return messages, data[pos:]
+
+
+def parse_listen(spec):
+    # "udp://127.0.0.1:5514" -> ("udp", ("127.0.0.1", 5514), "udp:127.0.0.1:5514")
+    # "unix:///tmp/ls.sock"  -> ("unix", "/tmp/ls.sock", "unix:/tmp/ls.sock")
+    url = urlsplit(spec)
+    if url.scheme in ("udp", "tcp"):
+        if url.port is None:
+            raise ValueError(f"{spec}: a port is required")
+        host = url.hostname or "127.0.0.1"
+        return url.scheme, (host, url.port), f"{url.scheme}:{host}:{url.port}"
+    if url.scheme in ("unix", "unixgram"):
+        path = url.netloc + url.path
+        if not path:
+            raise ValueError(f"{spec}: a socket path is required")
+        return url.scheme, path, f"{url.scheme}:{path}"
+    raise ValueError(f"{spec}: use udp://, tcp://, unix:// or unixgram://")
+
+
+def _remove_stale_socket(path):
+    # A previous run may have left its socket behind; never remove anything else
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class _DatagramReceiver(asyncio.DatagramProtocol):
+    # Datagrams can't be slowed down: they're batched per loop iteration
+    # and dropped (and counted) when the queue is full
+
+    def __init__(self, owner, source):
+        self.owner = owner
+        self.source = source
+        self.pending = []
+
+    def datagram_received(self, data, addr):
+        if not self.pending:
+            asyncio.get_running_loop().call_soon(self._flush)
+        self.pending.append(data)
+
+    def _flush(self):
+        messages, self.pending = self.pending, []
+        self.owner.offer(self.source, [syslog_line(message) for message in messages])
+
+
+class AsyncIngest:
+    """Files and network receivers on one event loop.
+
+    Sources put line batches on a bounded asyncio queue; one consumer hands
+    them to ``sink.push_many(lines, source)``. While ``sink.should_wait``
+    (the block overflow policy, see IngestQueue) sources read nothing more
+    until the sink calls ``sink.on_room``. A
+    slow pipeline then backs up into the sources (files stop being read,
+    TCP/Unix readers stop reading) instead of growing memory; under the
+    other policies the sink drops, samples or spills instead. UDP datagrams
+    that find the queue full are dropped and counted in ``dropped``.
+
+    Controlled with ``start`` (which raises if a receiver can't bind),
+    ``stop``, ``pause``, ``resume`` and ``join``. Files that can't be read
+    are skipped and the rest keep running; ``pop_errors`` returns them as
+    (path, error), plus (None, error) if the ingest thread itself failed.
+    """
+
+    def __init__(self, sink, filepaths=(), listeners=(), history_lines=HISTORY_LINES,
+                 from_start=False, follow=True, checkpoints=None):
+        self.sink = sink
+        self.listeners = [parse_listen(spec) for spec in listeners]
+        self.monitor = None
+        if filepaths:
+            # Reused for opening, positioning and checkpointing files; its
+            # callback only sees replayed history and archive lines
+            self.monitor = LogMonitor(filepaths, self._replay, history_lines,
+                                      from_start, follow, checkpoints)
+        self.paused = False
+        self.running = True
+        self.dropped = 0
+        self.received = {}  # source -> lines handed to the sink
+        self.error = None
+        self.errors = deque()  # (source, error) not yet collected by pop_errors
+        self.loop = None
+        self.thread = None
+        self._ready = threading.Event()
+        self._replay_source = None
+        self._replay_lines = []
+        self._unsent = []  # chunks read from files when the tail task was cancelled
+        self._wake_files = False
+        self._connections = set()
+        sink.on_room = lambda: self._call(lambda: self._room.set())
+
+    # ── control (any thread) ──
+    def start(self):
+        # Returns once every receiver is bound; re-raises a bind failure
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        if self.error:
+            self.thread.join()
+            raise self.error
+
+    def stop(self):
+        self.running = False
+        if self.monitor:
+            self.monitor.running = False
+        self._call(lambda: self._stopping.set())
+        self._call(lambda: self._room.set())
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+        self._wake_files = True
+        self._call(lambda: self._files_ready.set())
+        self._call(lambda: self._room.set())
+
+    def join(self, timeout=None):
+        if self.thread:
+            self.thread.join(timeout)
+
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def pop_errors(self):
+        errors = []
+        while self.errors:
+            errors.append(self.errors.popleft())
+        return errors
+
+    def _call(self, func):
+        loop = self.loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(func)
+        except RuntimeError:
+            pass  # loop already closed
+
+    # ── loop ──
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self._main())
+        finally:
+            self._ready.set()
+            self.loop.close()
+
+    async def _main(self):
+        self.queue = asyncio.Queue(RECEIVER_QUEUE_SIZE)
+        self._stopping = asyncio.Event()
+        self._files_ready = asyncio.Event()
+        self._room = asyncio.Event()  # set on sink room, resume and stop
+
+        servers = []
+        try:
+            for scheme, address, source in self.listeners:
+                servers.append(await self._listen(scheme, address, source))
+        except OSError as e:
+            self.error = e
+            for server in servers:
+                server.close()
+            return
+        self._ready.set()
+
+        consumer = asyncio.create_task(self._consume())
+        files = None
+        if self.monitor:
+            files = asyncio.create_task(self._tail_files())
+            files.add_done_callback(self._files_done)
+        stopping = asyncio.create_task(self._stopping.wait())
+
+        # Without receivers, a non-following file pass ends the session
+        waits = {stopping}
+        if files and not servers:
+            waits.add(files)
+        await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+
+        for server in servers:
+            server.close()
+        for writer in list(self._connections):
+            writer.close()
+        if files:
+            self.monitor.running = False
+            if not files.done():
+                files.cancel()
+            try:
+                await files
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                pass  # reported by _files_done
+        stopping.cancel()
+        consumer.cancel()
+        try:
+            await consumer  # hands off the batch it holds first
+        except asyncio.CancelledError:
+            pass
+
+        # Whatever was already read still goes to the pipeline, in order:
+        # files were checkpointed past all of it
+        while not self.queue.empty():
+            source, lines = self.queue.get_nowait()
+            self._hand_off(source, lines)
+        for source, lines in self._unsent:
+            self._hand_off(source, lines)
+        self._unsent.clear()
+
+        for scheme, address, _ in self.listeners:
+            if scheme in ("unix", "unixgram"):
+                _remove_stale_socket(address)
+
+    def _files_done(self, task):
+        # Reported as soon as tailing fails; receivers keep running
+        if not task.cancelled() and task.exception() is not None:
+            self.error = task.exception()
+            self.errors.append((None, self.error))
+
+    def _hand_off(self, source, lines):
+        self.sink.push_many(lines, source)
+        self.received[source] = self.received.get(source, 0) + len(lines)
+        if metrics.enabled:
+            metrics.add_lines(source, len(lines))
+
+    async def _wait_while(self, blocked):
+        # Sleeps until ``blocked()`` is false, re-checking whenever _room is
+        # set; clearing before the check means a wake-up can't be missed
+        room = self._room
+        while blocked():
+            room.clear()
+            if not blocked():
+                break
+            await room.wait()
+
+    async def _wait_for_room(self):
+        # Sources check this before reading more, so under the block policy
+        # unread data stays in the file or socket instead of this queue.
+        # A put with room doesn't yield, so let the consumer hand off first
+        await asyncio.sleep(0)
+        await self._wait_while(lambda: self.sink.should_wait and self.running)
+
+    async def _put(self, item):
+        await self._wait_for_room()
+        await self.queue.put(item)
+
+    async def _consume(self):
+        queue, sink = self.queue, self.sink
+        while True:
+            source, lines = await queue.get()
+            # A file read can be a whole READ_CHUNK_SIZE of lines: it goes
+            # over in slices, waiting for room before each, so under the
+            # block policy the sink ends up at most one slice past max_depth
+            sent = 0
+            try:
+                while sent < len(lines):
+                    await self._wait_while(lambda: self.paused or sink.should_wait)
+                    chunk = lines[sent:sent + HANDOFF_SLICE]
+                    sent += len(chunk)
+                    self._hand_off(source, chunk)
+            finally:
+                if sent < len(lines):
+                    # Also on shutdown: a batch taken off the queue is never lost
+                    self._hand_off(source, lines[sent:])
+            if metrics.enabled:
+                metrics.gauge("source_queue", queue.qsize())
+
+    def offer(self, source, lines):
+        # Non-blocking put for sources that can't wait (UDP)
+        try:
+            self.queue.put_nowait((source, lines))
+        except asyncio.QueueFull:
+            self.dropped += len(lines)
+            if metrics.enabled:
+                metrics.incr("dropped", len(lines))
+
+    # ── receivers ──
+    async def _listen(self, scheme, address, source):
+        loop = asyncio.get_running_loop()
+        handler = lambda reader, writer: self._read_stream(reader, writer, source)  # noqa: E731
+        if scheme == "tcp":
+            return await asyncio.start_server(handler, *address)
+        if scheme == "unix":
+            _remove_stale_socket(address)
+            return await asyncio.start_unix_server(handler, path=address)
+
+        if scheme == "udp":
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _DatagramReceiver(self, source), local_addr=address
+            )
+            return transport
+        _remove_stale_socket(address)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            sock.bind(address)
+        except OSError:
+            sock.close()
+            raise
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DatagramReceiver(self, source), sock=sock
+        )
+        return transport
+
+    async def _read_stream(self, reader, writer, source):
+        # Newline-delimited or octet-counted syslog, decided by the first bytes
+        self._connections.add(writer)
+        pending = b""
+        octet_counted = None
+        try:
+            while True:
+                await self._wait_for_room()
+                data = await reader.read(65536)
+                if not data:
+                    break
+                data = pending + data
+                if octet_counted is None:
+                    octet_counted = _OCTET_FRAME.match(data) is not None
+                if octet_counted:
+                    messages, pending = split_octet_frames(data)
+                else:
+                    messages = data.split(b"\n")
+                    pending = messages.pop()
+                if len(pending) > MAX_MESSAGE_SIZE:
+                    messages.append(pending[:MAX_MESSAGE_SIZE])
+                    pending = b""
+                if messages:
+                    # Waiting here is the back-pressure: the peer's sends block
+                    await self.queue.put((source, [syslog_line(message) for message in messages]))
+            if pending.strip():
+                await self.queue.put((source, [syslog_line(pending)]))
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    # ── files ──
+    def _replay(self, line, filepath):
+        # LogMonitor callback while opening files (runs in a helper thread):
+        # history and archive lines are queued in blocks
+        if filepath != self._replay_source:
+            self._flush_replay()
+            self._replay_source = filepath
+        self._replay_lines.append(line)
+        if len(self._replay_lines) >= REPLAY_BLOCK:
+            self._flush_replay()
+
+    def _flush_replay(self):
+        if not self._replay_lines:
+            return
+        item = (self._replay_source, self._replay_lines)
+        self._replay_lines = []
+        future = asyncio.run_coroutine_threadsafe(self._put(item), self.loop)
+        while self.running:
+            try:
+                future.result(0.5)
+                return
+            except concurrent.futures.TimeoutError:
+                continue
+        future.cancel()
+
+    async def _open_files(self):
+        # Opening can replay history or stream whole archives, so it runs
+        # in a daemon thread rather than on the loop
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def work():
+            try:
+                result = self.monitor.open_sources()
+                self._flush_replay()
+                self.errors.extend(self.monitor.skipped)
+            except BaseException as e:
+                self._call(lambda error=e: done.done() or done.set_exception(error))
+            else:
+                self._call(lambda: done.done() or done.set_result(result))
+
+        threading.Thread(target=work, daemon=True).start()
+        return await done
+
+    async def _drain(self, tail):
+        # Reads a chunk only once the sink has room. Lines read but not
+        # queued when stopping are already past the checkpoint, so they are
+        # kept for the shutdown hand-off
+        await self._wait_for_room()
+        lines = tail.poll()
+        while lines:
+            if not self.monitor.running:
+                self._unsent.append((tail.filepath, lines))
+                return
+            try:
+                await self.queue.put((tail.filepath, lines))
+            except asyncio.CancelledError:
+                self._unsent.append((tail.filepath, lines))
+                raise
+            await self._wait_for_room()
+            if not self.monitor.running:
+                return
+            lines = tail.read_lines()
+
+    async def _tail_files(self):
+        monitor = self.monitor
+        loop = asyncio.get_running_loop()
+        tails = await self._open_files()
+        watched = list(tails)
+
+        backend = create_backend(watched)
+        inotify = isinstance(backend, InotifyBackend)
+        if inotify:
+            timeout = CHECKPOINT_INTERVAL if monitor.checkpoints else None
+
+            def readable():
+                # One-shot: the fd stays readable until read_events, which
+                # may be a while if the sink is full, so the reader is only
+                # armed while waiting for changes
+                loop.remove_reader(backend.fd)
+                self._files_ready.set()
+        else:
+            timeout = POLL_INTERVAL
+
+        try:
+            changed = watched
+            while monitor.running:
+                if not self.paused:
+                    for path in changed:
+                        await self._drain(tails[path])
+                if monitor.checkpoints:
+                    monitor.save_checkpoints(tails)
+                if not monitor.follow:
+                    # The pass is over: a last line without a newline won't get one
+                    for tail in tails.values():
+                        line = tail.partial_line()
+                        if line:
+                            await self.queue.put((tail.filepath, [line]))
+                    break
+
+                if inotify:
+                    loop.add_reader(backend.fd, readable)
+                try:
+                    await asyncio.wait_for(self._files_ready.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                if inotify:
+                    loop.remove_reader(backend.fd)
+                self._files_ready.clear()
+                if inotify and not self._wake_files:
+                    changed = backend.read_events()
+                else:
+                    self._wake_files = False
+                    changed = watched
+        finally:
+            if inotify:
+                loop.remove_reader(backend.fd)
+            backend.close()
+            if monitor.checkpoints:
+                monitor.save_checkpoints(tails, force=True)
+            for tail in tails.values():
+                tail.close()
@@ -0,0 +1,134 @@
+# app/core/bulk.py
+# Bulk import of archived logs: the file is cut into newline-aligned byte
+# ranges (or, for compressed files, streamed line batches) that are parsed
+# in a process pool; results come back in file order.
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from core.formats import TEXT, detect_format, get_parser, head_lines
+from core.rotation import expand_rotation_sets, is_compressed, iter_lines
+from utils.constants import BULK_CHUNK_SIZE, BULK_WORKERS
+
+
+def chunk_ranges(filepath, chunk_size=BULK_CHUNK_SIZE):
+    # [(start, end), ...] covering the file, each ending just after a newline
+    size = os.path.getsize(filepath)
+    ranges = []
+    with open(filepath, "rb") as f:
+        start = 0
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                f.seek(end)
+                f.readline()  # run on to the end of the current line
+                end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_lines(lines, log_format=TEXT):
+    # Worker: returns (line_count, [(line, level, timestamp, message), ...]).
+    # Plain tuples keep the pickled result small.
+    parse = get_parser(log_format)
+    rows = []
+    for line in lines:
+        record = parse(line)
+        if record:
+            rows.append((line, record.level, record.timestamp, record.message))
+    return len(lines), rows
+
+
+def parse_range(filepath, start, end, log_format=TEXT):
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return parse_lines([line.decode("utf-8", errors="replace").strip() for line in data.splitlines()], log_format)
+
+
+def _line_batches(filepath, chunk_size):
+    # Compressed input can't be split by byte offset: decompress as a stream
+    # and cut it into batches of roughly ``chunk_size`` bytes of text
+    batch, size = [], 0
+    for line in iter_lines(filepath):
+        batch.append(line)
+        size += len(line) + 1
+        if size >= chunk_size:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def _tasks(filepath, chunk_size, log_format):
+    if is_compressed(filepath):
+        for lines in _line_batches(filepath, chunk_size):
+            yield parse_lines, (lines, log_format)
+    else:
+        for start, end in chunk_ranges(filepath, chunk_size):
+            yield parse_range, (filepath, start, end, log_format)
+
+
+def _call(task):
+    func, args = task
+    return func(*args)
+
+
+def _submit_in_order(pool, tasks, in_flight):
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(_call, task))
+        if len(pending) >= in_flight:
+            break
+    while pending:
+        line_count, rows = pending.popleft().result()
+        for task in tasks:
+            pending.append(pool.submit(_call, task))
+            break
+        yield rows, line_count
+
+
+def iter_parsed_chunks(filepath, workers=BULK_WORKERS, chunk_size=BULK_CHUNK_SIZE, log_format=None,
+                       pool=None, in_flight=None):
+    """Yield ``(rows, line_count)`` per chunk, in file order, where rows are
+    ``(line, level, timestamp, message)`` tuples.
+
+    At most ``in_flight`` chunks (default ``2 * workers``) are in flight, so
+    memory stays bounded however large the file is. The format is detected
+    from the file's first lines unless ``log_format`` names one. Several
+    files can share one ``pool`` instead of each starting their own.
+    """
+    workers = workers or os.cpu_count() or 1
+    in_flight = in_flight or 2 * workers
+    tasks = _tasks(filepath, chunk_size, log_format or detect_format(head_lines(filepath)))
+
+    if pool is not None:
+        yield from _submit_in_order(pool, tasks, in_flight)
+        return
+
+    if workers == 1:
+        for func, args in tasks:
+            line_count, rows = func(*args)
+            yield rows, line_count
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from _submit_in_order(pool, tasks, in_flight)
+
+
+def bulk_import(filepath, pipeline, workers=BULK_WORKERS, chunk_size=BULK_CHUNK_SIZE,
+                on_batch=None, rotated=False, log_format=None):
+    # Parse ``filepath`` in parallel and feed it to ``pipeline`` in order.
+    # With ``rotated``, its whole rotation set is imported oldest first as
+    # one stream under the live file's name. ``on_batch(accepted, alerts)``
+    # sees each merged chunk.
+    members = expand_rotation_sets([filepath]) if rotated else [(filepath, filepath)]
+    for member, logical_path in members:
+        for rows, line_count in iter_parsed_chunks(member, workers, chunk_size, log_format):
+            accepted, alerts = pipeline.process_parsed(logical_path, rows, line_count)
+            if on_batch:
+                on_batch(accepted, alerts)
+    return pipeline.lines_seen
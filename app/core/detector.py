@@ -1,21 +1,115 @@
 # app/core/detector.py
-from utils.constants import ALERT_THRESHOLDS
+import time
+
+from utils.constants import (
+    ALERT_THRESHOLDS,
+    ALERT_WINDOW,
+    ALERT_BUCKETS,
+    ALERT_COOLDOWN,
+    ALERT_RESET_RATIO,
+    ALERT_PER_FILE,
+)
+
+
+class RollingCounter:
+    """Event count over a sliding window, kept in fixed-size time buckets.
+
+    Memory is constant (``buckets`` slots) and each update touches at most
+    the buckets that expired since the previous one.
+    """
+
+    def __init__(self, window, buckets):
+        self.window = window
+        self.bucket_width = window / buckets
+        self.counts = [0] * buckets
+        self.current = None  # absolute index of the newest bucket
+        self.total = 0
+
+    def advance(self, now):
+        # Expire buckets that fell out of the window; returns the live total
+        slot = int(now // self.bucket_width)
+        if self.current is None:
+            self.current = slot
+        elif slot > self.current:
+            size = len(self.counts)
+            for expired in range(self.current + 1, min(slot, self.current + size) + 1):
+                index = expired % size
+                self.total -= self.counts[index]
+                self.counts[index] = 0
+            self.current = slot
+        return self.total
+
+    def add(self, now, amount=1):
+        # ``now`` may be earlier than the newest bucket (lines out of order
+        # across files): it counts in its own bucket, or not at all once
+        # that has left the window
+        self.advance(now)
+        slot = int(now // self.bucket_width)
+        size = len(self.counts)
+        if slot <= self.current - size:
+            return self.total
+        self.counts[slot % size] += amount
+        self.total += amount
+        return self.total
+
+
+class _AlertState:
+    __slots__ = ("counter", "active", "last_fired")
+
+    def __init__(self, window, buckets):
+        self.counter = RollingCounter(window, buckets)
+        self.active = False
+        self.last_fired = None
+
 
 class Detector:
-    def __init__(self):
+    def __init__(self, thresholds=None, window=ALERT_WINDOW, buckets=ALERT_BUCKETS,
+                 cooldown=ALERT_COOLDOWN, per_file=ALERT_PER_FILE):
+        self.thresholds = dict(thresholds or ALERT_THRESHOLDS)
+        self.window = window
+        self.buckets = buckets
+        self.cooldown = cooldown
+        self.per_file = per_file
         self.reset()
 
     def reset(self):
-        self.counts = {level: 0 for level in ALERT_THRESHOLDS}
-
-    def process(self, level: str):
-        if level in self.counts:
-            self.counts[level] += 1
-
-            if self.counts[level] >= ALERT_THRESHOLDS[level]:
-                return {
-                    "level": level,
-                    "count": self.counts[level],
-                    "message": f"{level} threshold exceeded"
-                }
-        return None
+        self.states = {}
+
+    def _state(self, key):
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = _AlertState(self.window, self.buckets)
+        return state
+
+    def process(self, level: str, filepath=None, now=None):
+        threshold = self.thresholds.get(level)
+        if threshold is None:
+            return None
+
+        now = time.time() if now is None else now
+        key = (level, filepath) if self.per_file else level
+        state = self._state(key)
+
+        # Hysteresis: an incident ends once the rate has dropped well below
+        # the threshold and the cooldown has passed
+        if state.active:
+            previous = state.counter.advance(now)
+            if (previous <= int(threshold * ALERT_RESET_RATIO)
+                    and now - state.last_fired >= self.cooldown):
+                state.active = False
+
+        count = state.counter.add(now)
+        if state.active or count < threshold:
+            return None
+
+        state.active = True
+        state.last_fired = now
+        alert = {
+            "level": level,
+            "count": count,
+            "window": self.window,
+            "message": f"{level} threshold exceeded ({count} in {self.window:g}s)"
+        }
+        if self.per_file and filepath:
+            alert["file"] = filepath
+        return alert
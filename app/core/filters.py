@@ -0,0 +1,101 @@
+# app/core/filters.py
+import re
+
+
+# Numbered or named back-references would point at another pattern's
+# groups once the patterns share one alternation
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+class _AnyOf:
+    # Patterns that can't share one alternation (inline global flags such as
+    # "(?i)", a group name used twice, back-references), searched in turn
+
+    __slots__ = ("patterns",)
+
+    def __init__(self, patterns):
+        self.patterns = patterns
+
+    def search(self, line):
+        for pattern in self.patterns:
+            match = pattern.search(line)
+            if match is not None:
+                return match
+        return None
+
+
+def _combine(patterns, flags):
+    # One alternation instead of a loop over patterns per line, when the
+    # patterns allow it. Each is compiled on its own first, so an invalid
+    # one raises re.error
+    patterns = [p for p in patterns if p]
+    if not patterns:
+        return None
+    compiled = [re.compile(p, flags) for p in patterns]
+    if len(compiled) == 1:
+        return compiled[0]
+    if not any(_BACKREFERENCE.search(p) for p in patterns):
+        try:
+            return re.compile("|".join(f"(?:{p})" for p in patterns), flags)
+        except re.error:
+            pass
+    return _AnyOf(compiled)
+
+
+class LogFilter:
+    """User-defined text filter, compiled once.
+
+    A line passes when it matches any ``include`` regex (or there are
+    none), contains every keyword, and matches no ``exclude`` regex.
+    Invalid patterns raise ``re.error`` from the constructor.
+    """
+
+    __slots__ = ("include", "exclude", "keywords", "ignore_case",
+                 "_include", "_exclude", "_keywords")
+
+    def __init__(self, include=(), exclude=(), keywords=(), ignore_case=True):
+        self.include = [p for p in include if p]
+        self.exclude = [p for p in exclude if p]
+        self.keywords = [k for k in keywords if k]
+        self.ignore_case = ignore_case
+
+        flags = re.IGNORECASE if ignore_case else 0
+        self._include = _combine(self.include, flags)
+        self._exclude = _combine(self.exclude, flags)
+        self._keywords = [k.lower() for k in self.keywords] if ignore_case else self.keywords
+
+    @property
+    def active(self):
+        return bool(self.include or self.exclude or self.keywords)
+
+    def matches(self, line):
+        if self._keywords:
+            text = line.lower() if self.ignore_case else line
+            for keyword in self._keywords:
+                if keyword not in text:
+                    return False
+        if self._include is not None and self._include.search(line) is None:
+            return False
+        if self._exclude is not None and self._exclude.search(line) is not None:
+            return False
+        return True
+
+    def to_dict(self):
+        return {
+            "include": self.include,
+            "exclude": self.exclude,
+            "keywords": self.keywords,
+            "ignore_case": self.ignore_case,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            include=data.get("include", ()),
+            exclude=data.get("exclude", ()),
+            keywords=data.get("keywords", ()),
+            ignore_case=data.get("ignore_case", True),
+        )
+
+    def __repr__(self):
+        return f"LogFilter(include={self.include!r}, exclude={self.exclude!r}, keywords={self.keywords!r})"
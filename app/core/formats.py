@@ -0,0 +1,335 @@
+# app/core/formats.py
+# Declarative log formats. Each definition is compiled once into a
+# line -> LogRecord function; a file's format is detected from its first
+# lines and cached, so later lines go straight to the right parser.
+import json
+import os
+import re
+from datetime import datetime
+
+from core.parser import LogRecord, normalize_level, parse_log_line
+from core.rotation import iter_lines
+from utils.constants import FORMAT_SAMPLE_LINES, LOG_FORMATS
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # optional; the standard decoder is slower but equivalent here
+    _loads = json.loads
+
+TEXT = "text"  # LogSentinel's own shapes (core.parser.parse_log_line)
+
+# Keys looked up, in order, in JSON and logfmt records; dotted keys reach
+# into nested objects
+DEFAULT_KEYS = {
+    "level": ("level", "severity", "lvl", "levelname", "log.level"),
+    "message": ("message", "msg", "event", "text"),
+    "timestamp": ("timestamp", "time", "ts", "@timestamp", "asctime"),
+}
+
+# Definition keys:
+#   name, type     "regex", "json" or "logfmt"
+#   pattern        regex types: matched at the start of the line; named
+#                  groups "level", "message" and "timestamp" fill the record
+#   message        regex types: optional template over the groups, e.g. "{status} {request}"
+#   level_field    take the level from this group instead, via level_map
+#   level_map      {value prefix: level}, e.g. {"5": "ERROR"} for HTTP 5xx
+#   default_level  used when the line carries no level
+#   level, message, timestamp (json/logfmt): key lists overriding DEFAULT_KEYS
+BUILTIN_FORMATS = (
+    {"name": "json", "type": "json", "default_level": "INFO"},
+    {"name": "logfmt", "type": "logfmt", "default_level": "INFO"},
+    {
+        # logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        "name": "python",
+        "type": "regex",
+        "pattern": r"(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - (?P<logger>.+?) - "
+                   r"(?P<level>[A-Za-z]+) - (?P<message>.*)",
+    },
+    {
+        # logging.basicConfig() default: "%(levelname)s:%(name)s:%(message)s"
+        "name": "python-basic",
+        "type": "regex",
+        "pattern": r"(?P<level>[A-Z]+):(?P<logger>[^:\s]*):(?P<message>.*)",
+    },
+    {
+        # nginx/Apache combined log format; the status code sets the level
+        "name": "access-log",
+        "type": "regex",
+        "pattern": r'\S+ \S+ \S+ \[(?P<timestamp>[^\]]+)\] "(?P<request>[^"]*)" (?P<status>\d{3}) ',
+        "message": "{status} {request}",
+        "level_field": "status",
+        "level_map": {"5": "ERROR", "4": "WARNING"},
+        "default_level": "INFO",
+    },
+    {
+        # nginx error log: 2026/01/02 18:40:01 [error] 1234#0: *5 message
+        "name": "nginx-error",
+        "type": "regex",
+        "pattern": r"(?P<timestamp>\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}) \[(?P<level>[a-z]+)\] (?P<message>.*)",
+    },
+)
+
+# pino / bunyan numeric levels (10 trace, 20 debug, 30 info, 40 warn,
+# 50 error, 60 fatal): lowest value of each level; trace and debug have none
+NUMERIC_LEVELS = ((60, "CRITICAL"), (50, "ERROR"), (40, "WARNING"), (30, "INFO"))
+
+_LOGFMT_PAIR = re.compile(r'([\w.@/-]+)=("(?:[^"\\]|\\.)*"|[^\s"]*)')
+
+
+def _lookup(data, keys):
+    for key in keys:
+        value = data.get(key)
+        if value is None and "." in key:
+            value = data
+            for part in key.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+        if value is not None:
+            return value
+    return None
+
+
+def _timestamp_text(value):
+    # Epoch numbers (seconds or milliseconds) become the app's timestamp shape
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if value > 1e11:
+            value /= 1000
+        try:
+            return datetime.fromtimestamp(value).isoformat(sep=" ", timespec="milliseconds")
+        except (OverflowError, OSError, ValueError):
+            return ""
+    return str(value)
+
+
+def _decode_json(line):
+    if line[:1] != "{":
+        return None
+    try:
+        data = _loads(line)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _decode_logfmt(line):
+    data = {}
+    for key, value in _LOGFMT_PAIR.findall(line):
+        if value[:1] == '"':
+            value = value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+        data[key] = value
+    return data or None
+
+
+def _mapping_level(value):
+    # "warn", "ERROR", 50 or "50" -> one of LOG_LEVELS; None when unknown
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return next((level for lowest, level in NUMERIC_LEVELS if value >= lowest), None)
+    return normalize_level(value)
+
+
+def _mostly_pairs(line):
+    # True when key=value pairs make up more than half of the line
+    covered = sum(match.end() - match.start() for match in _LOGFMT_PAIR.finditer(line))
+    return covered * 2 > len(line)
+
+
+def _mapping_parser(spec, decode, require_key, fallback):
+    level_keys = tuple(spec.get("level", DEFAULT_KEYS["level"]))
+    message_keys = tuple(spec.get("message", DEFAULT_KEYS["message"]))
+    timestamp_keys = tuple(spec.get("timestamp", DEFAULT_KEYS["timestamp"]))
+    default_level = spec.get("default_level")
+
+    def parse(line):
+        data = decode(line)
+        if data is None:
+            return fallback(line) if fallback else None
+        raw_level = _lookup(data, level_keys)
+        message = _lookup(data, message_keys)
+        if require_key and raw_level is None and (message is None or not _mostly_pairs(line)):
+            # Text that merely contains "key=value"
+            return fallback(line) if fallback else None
+        level = default_level if raw_level is None else _mapping_level(raw_level)
+        if level is None:
+            return None
+        message = line if message is None else str(message)
+        return LogRecord(level, message, _timestamp_text(_lookup(data, timestamp_keys)))
+
+    return parse
+
+
+def _regex_parser(spec, fallback):
+    match_line = re.compile(spec["pattern"]).match
+    template = spec.get("message")
+    level_field = spec.get("level_field")
+    level_map = tuple(spec.get("level_map", {}).items())
+    default_level = spec.get("default_level")
+
+    def parse(line):
+        match = match_line(line)
+        if match is None:
+            return fallback(line) if fallback else None
+        groups = match.groupdict()
+        if level_field:
+            value = groups.get(level_field) or ""
+            level = next((mapped for prefix, mapped in level_map if value.startswith(prefix)), default_level)
+        else:
+            raw_level = groups.get("level")
+            level = normalize_level(raw_level) if raw_level else default_level
+        if level is None:
+            return None
+        message = template.format_map(groups) if template else (groups.get("message") or "").strip()
+        if not message:
+            return None
+        return LogRecord(level, message, groups.get("timestamp") or "")
+
+    return parse
+
+
+def _spec_level(spec, value, key):
+    level = normalize_level(value)
+    if level is None:
+        raise ValueError(f"unknown level {value!r} in {key} of log format {spec.get('name')!r}")
+    return level
+
+
+def compile_format(spec, fallback=None):
+    # Definition -> parse(line) returning a LogRecord or None. Lines the
+    # format does not recognise at all go to ``fallback`` when given; lines
+    # it recognises but rejects (an unknown level such as DEBUG) do not.
+    # Raises ValueError for an unknown type or a level outside LOG_LEVELS
+    # (after aliases and case), re.error for a bad pattern.
+    spec = dict(spec)
+    if spec.get("default_level") is not None:
+        spec["default_level"] = _spec_level(spec, spec["default_level"], "default_level")
+    if "level_map" in spec:
+        spec["level_map"] = {prefix: _spec_level(spec, level, "level_map")
+                             for prefix, level in spec["level_map"].items()}
+    kind = spec.get("type")
+    if kind == "regex":
+        return _regex_parser(spec, fallback)
+    if kind == "json":
+        return _mapping_parser(spec, _decode_json, False, fallback)
+    if kind == "logfmt":
+        return _mapping_parser(spec, _decode_logfmt, True, fallback)
+    raise ValueError(f"unknown log format type {kind!r} in {spec.get('name')!r}")
+
+
+def format_names():
+    # Detection order: user definitions, built-ins, then the plain text parser
+    names = [spec["name"] for spec in LOG_FORMATS]
+    names += [spec["name"] for spec in BUILTIN_FORMATS if spec["name"] not in names]
+    return names + [TEXT]
+
+
+_compiled = {}  # (name, with fallback) -> parser, per process
+
+
+def _compiled_parser(name, fallback):
+    key = (name, fallback is not None)
+    parser = _compiled.get(key)
+    if parser is None:
+        if name == TEXT:
+            parser = parse_log_line
+        else:
+            for spec in (*LOG_FORMATS, *BUILTIN_FORMATS):
+                if spec["name"] == name:
+                    parser = compile_format(spec, fallback)
+                    break
+            else:
+                raise KeyError(name)
+        _compiled[key] = parser
+    return parser
+
+
+def _bare_parser(name):
+    return _compiled_parser(name, None)
+
+
+def get_parser(name):
+    # Parser for a named format; lines that are not in it at all (stack
+    # traces, banners) still get a try with the text parser
+    return _compiled_parser(name, parse_log_line)
+
+
+def detect_format(lines):
+    # Name of the format that parses most of ``lines``. Earlier formats win
+    # ties, except against the text parser: a format that only ties with it
+    # is chosen when it reads every line at the same level (it adds
+    # timestamps or fields), never when it would change a level
+    sample = [line for line in lines if line][:FORMAT_SAMPLE_LINES]
+    text = [parse_log_line(line) for line in sample]
+    text_score = sum(1 for record in text if record is not None)
+    best, best_score = TEXT, text_score
+    for name in format_names()[:-1]:
+        parse = _bare_parser(name)
+        records = [parse(line) for line in sample]
+        score = sum(1 for record in records if record is not None)
+        if score > best_score or (score == text_score and best == TEXT and score
+                                  and _same_levels(records, text)):
+            best, best_score = name, score
+            if score == len(sample):
+                break
+    return best
+
+
+def _same_levels(records, text):
+    return all(record is None or (other is not None and record.level == other.level)
+               for record, other in zip(records, text))
+
+
+def head_lines(filepath, count=FORMAT_SAMPLE_LINES):
+    # First lines of a file, or [] for sockets, missing or unreadable files
+    if not os.path.isfile(filepath):
+        return []
+    lines = []
+    try:
+        for line in iter_lines(filepath):
+            if line:
+                lines.append(line)
+                if len(lines) >= count:
+                    break
+    except (OSError, EOFError):
+        pass
+    return lines
+
+
+class FileFormats:
+    """Parser per source, detected once and cached.
+
+    The first lines of the file decide; sources that are not files
+    (network receivers) are judged on the first batch they deliver. With
+    ``forced`` every source uses that format.
+    """
+
+    def __init__(self, forced=None):
+        # Compile the user's definitions up front so a bad one fails here,
+        # not on the first line that reaches it
+        for spec in LOG_FORMATS:
+            _bare_parser(spec["name"])
+        if forced is not None:
+            _bare_parser(forced)  # raises KeyError for an unknown name
+        self.forced = forced
+        self.clear()
+
+    def clear(self):
+        self.parsers = {}
+        self.names = {}  # source -> detected format name
+
+    def parser_for(self, filepath, batch=()):
+        parser = self.parsers.get(filepath)
+        if parser is not None:
+            return parser
+        if self.forced is not None:
+            name = self.forced
+        else:
+            sample = head_lines(filepath) or [line for line, path in batch if path == filepath]
+            if not sample:
+                return parse_log_line  # nothing to judge yet; decide on a later batch
+            name = detect_format(sample)
+        self.names[filepath] = name
+        parser = self.parsers[filepath] = get_parser(name)
+        return parser
@@ -0,0 +1,188 @@
+# app/core/ingest.py
+import re
+import threading
+from collections import deque
+
+from core.metrics import metrics
+from utils.constants import INGEST_MAX_DEPTH, OVERFLOW_POLICY, OVERFLOW_SAMPLE_EVERY
+
+OVERFLOW_POLICIES = ("block", "drop_info", "sample", "spill")
+
+# Severity a line mentions, judged before parsing: 2 error/critical, 1 warning
+_SEVERE = re.compile(r"(?i)\b(?:(err(?:or)?|crit(?:ical)?|fatal|emerg|alert)|(warn(?:ing)?))\b")
+
+
+def _severity(line):
+    match = _SEVERE.search(line)
+    if match is None:
+        return 0
+    return 2 if match.group(1) else 1
+
+
+class IngestQueue:
+    """Thread-safe hand-off between monitor threads and the UI thread.
+
+    Monitors call ``push`` from any thread; the UI drains everything that
+    has accumulated once per tick and processes it as one batch.
+
+    Past ``max_depth`` lines the overflow policy applies:
+
+    - ``block``: nothing is dropped; producers that can wait check
+      ``should_wait`` and stop reading until the UI catches up. ``on_room``,
+      if set, is called (from the draining thread) when a drain or clear
+      leaves room again, so they can wait for it instead of polling
+    - ``drop_info``: lines that mention no warning or error are dropped;
+      past twice ``max_depth`` warnings go too, errors are always kept
+    - ``sample``: one line in ``sample_every`` of those past ``max_depth``
+      is kept
+    - ``spill``: lines go to ``spill`` (a SpillQueue on disk) and are
+      drained from there, in order, once the queue has room again
+    """
+
+    def __init__(self, max_depth=INGEST_MAX_DEPTH, policy=OVERFLOW_POLICY,
+                 spill=None, sample_every=OVERFLOW_SAMPLE_EVERY):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy {policy!r}")
+        if policy == "spill" and spill is None:
+            raise ValueError("the spill policy needs a spill queue")
+        # deque.append / popleft are atomic, so the fast path needs no lock
+        self._items = deque()
+        self._lock = threading.Lock()  # overflow and spill transitions
+        self.max_depth = max_depth
+        self.policy = policy
+        self.spill = spill
+        self.sample_every = max(1, sample_every)
+        self._sample_count = 0
+        self._spilling = False
+        self.on_room = None
+        self.dropped = 0
+        self.spilled = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.total_batches = 0
+        self.total_items = 0
+
+    def push(self, line, filepath):
+        self.push_many([line], filepath)
+
+    def push_many(self, lines, source):
+        items = self._items
+        if not self._spilling and len(items) + len(lines) <= self.max_depth:
+            items.extend([(line, source) for line in lines])
+            return
+        with self._lock:
+            self._overflow(lines, source)
+
+    def _overflow(self, lines, source):
+        items = self._items
+        policy = self.policy
+        if policy == "block":
+            # Producers wait on ``should_wait`` before pushing
+            items.extend([(line, source) for line in lines])
+            return
+
+        if policy == "spill":
+            if not self._spilling:
+                room = max(0, self.max_depth - len(items))
+                items.extend([(line, source) for line in lines[:room]])
+                lines = lines[room:]
+                if not lines:
+                    return
+                self._spilling = True
+            stored = self.spill.push_many(lines, source)
+            self.spilled += stored
+            self._count_dropped(len(lines) - stored)
+            if metrics.enabled:
+                metrics.incr("spilled", stored)
+            return
+
+        # Lines that fit are kept; the policy only applies to the rest
+        room = max(0, self.max_depth - len(items))
+        overflow = lines[room:]
+        if policy == "drop_info":
+            keep_from = 1 if len(items) < 2 * self.max_depth else 2
+            kept = lines[:room] + [line for line in overflow if _severity(line) >= keep_from]
+        else:
+            every = self.sample_every
+            start = (-self._sample_count) % every
+            kept = lines[:room] + overflow[start::every]
+            self._sample_count += len(overflow)
+        items.extend([(line, source) for line in kept])
+        self._count_dropped(len(lines) - len(kept))
+
+    def _count_dropped(self, count):
+        if count:
+            self.dropped += count
+            if metrics.enabled:
+                metrics.incr("dropped", count)
+
+    @property
+    def should_wait(self):
+        # True while producers that can slow down (file readers, stream
+        # receivers) should hold off under the block policy
+        return self.policy == "block" and len(self._items) >= self.max_depth
+
+    def drain(self, limit=None):
+        items = self._items
+        if self._spilling:
+            # Spilled lines are read back one batch at a time
+            wanted = (self.max_depth if limit is None else limit) - len(items)
+            if wanted > 0:
+                self._refill(wanted)
+        count = len(items)
+        if limit is not None:
+            count = min(count, limit)
+
+        batch = [items.popleft() for _ in range(count)]
+
+        self.last_batch_size = count
+        if count:
+            self.total_batches += 1
+            self.total_items += count
+            self.max_batch_size = max(self.max_batch_size, count)
+            if len(items) < self.max_depth:
+                self._notify_room()
+        return batch
+
+    def _notify_room(self):
+        on_room = self.on_room
+        if on_room is not None and self.policy == "block":
+            on_room()
+
+    def _refill(self, count):
+        # New lines keep going to disk until the spill is empty, so order holds
+        with self._lock:
+            self._items.extend(self.spill.pop(count))
+            if not self.spill.depth:
+                self._spilling = False
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            if self.spill is not None:
+                self.spill.clear()
+            self._spilling = False
+            self._sample_count = 0
+            self.dropped = 0
+            self.spilled = 0
+        self._notify_room()
+
+    @property
+    def depth(self):
+        return len(self._items)
+
+    @property
+    def spill_depth(self):
+        return self.spill.depth if self.spill is not None else 0
+
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "last_batch": self.last_batch_size,
+            "max_batch": self.max_batch_size,
+            "batches": self.total_batches,
+            "items": self.total_items,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "spill_depth": self.spill_depth,
+        }
@@ -0,0 +1,129 @@
+# app/core/metrics.py
+# Lightweight pipeline instrumentation. Call sites check ``metrics.enabled``
+# before doing any timing, so a disabled instance costs one attribute read.
+import json
+import time
+from bisect import bisect_left
+
+from utils.constants import METRICS_ENABLED
+
+# Histogram bucket upper bounds: 1 µs doubling up to ~8 s
+_BOUNDS = [1e-6 * 2 ** i for i in range(24)]
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(_BOUNDS) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value, weight=1):
+        self.counts[bisect_left(_BOUNDS, value)] += weight
+        self.total += weight
+        self.sum += value * weight
+
+    def percentile(self, pct):
+        # Upper bound of the bucket holding the pct-th observation
+        if not self.total:
+            return 0.0
+        target = self.total * pct / 100
+        seen = 0
+        for bound, count in zip(_BOUNDS, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return _BOUNDS[-1]
+
+    def summary(self):
+        mean = self.sum / self.total if self.total else 0.0
+        return {
+            "count": self.total,
+            "mean": mean,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class Metrics:
+    RATE_INTERVAL = 1.0  # seconds between lines/s recalculations
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.file_lines = {}       # filepath -> lines read by the monitor
+        self.counters = {}         # name -> running total (unparsed, dropped, ...)
+        self.gauges = {}           # name -> last value (queue depth, batch size)
+        self.histograms = {}       # name -> Histogram of seconds
+        self._rate_base = ({}, time.time())
+        self._rates = {}
+
+    # ── recording ──
+    def add_lines(self, filepath, count):
+        self.file_lines[filepath] = self.file_lines.get(filepath, 0) + count
+
+    def incr(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def observe(self, name, seconds, weight=1):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds, weight)
+
+    # ── reading ──
+    def rates(self):
+        # Lines/s per file, recomputed at most once per RATE_INTERVAL
+        base_counts, base_time = self._rate_base
+        now = time.time()
+        elapsed = now - base_time
+        if elapsed >= self.RATE_INTERVAL:
+            current = dict(self.file_lines)
+            self._rates = {
+                path: (count - base_counts.get(path, 0)) / elapsed
+                for path, count in current.items()
+            }
+            self._rate_base = (current, now)
+        return self._rates
+
+    def snapshot(self):
+        return {
+            "time": time.time(),
+            "lines_per_s": self.rates(),
+            "file_lines": dict(self.file_lines),
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "histograms": {name: h.summary() for name, h in self.histograms.items()},
+        }
+
+    def status_line(self):
+        rate = sum(self.rates().values())
+        parse = self.histograms.get("parse_line")
+        frame = self.histograms.get("render_frame")
+        parts = [f"{rate:,.0f} lines/s"]
+        if parse:
+            parts.append(f"parse p95 {parse.percentile(95) * 1e6:.0f}µs")
+        if frame:
+            parts.append(f"frame p95 {frame.percentile(95) * 1e3:.1f}ms")
+        parts.append(f"queue {self.gauges.get('queue_depth', 0)}")
+        parts.append(f"unparsed {self.counters.get('unparsed', 0)}")
+        dropped = self.counters.get("dropped")
+        if dropped:
+            parts.append(f"dropped {dropped}")
+        return " | ".join(parts)
+
+    def dump(self, path):
+        # One JSON object per line, appended
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.snapshot()) + "\n")
+
+
+# Shared instance used by the monitor, pipeline and dashboard
+metrics = Metrics()
@@ -34,42 +34,390 @@
 #     def stop(self):
 #         self.running = False
 
+import hashlib
+import os
+import struct
+import sys
 import time
+from collections import deque
 
+from core.rotation import is_compressed, iter_lines, rotation_set
+from utils.constants import HISTORY_LINES, CHECKPOINT_INTERVAL
 
-class LogMonitor:
-    def __init__(self, filepath, callback):
+TAIL_BLOCK_SIZE = 64 * 1024
+READ_CHUNK_SIZE = 1024 * 1024  # bytes read per call while catching up
+HASH_BYTES = 4096  # trailing bytes of the last line that go into its checkpoint hash
+
+
+def line_hash(line):
+    return hashlib.blake2b(line[-HASH_BYTES:], digest_size=16).hexdigest()
+
+
+def line_before(file, offset):
+    # Raw bytes of the line ending just before ``offset``, or None when
+    # ``offset`` is not at a line boundary. Moves the file position.
+    if offset <= 0:
+        return b""
+    start = max(0, offset - TAIL_BLOCK_SIZE)
+    file.seek(start)
+    data = file.read(offset - start)
+    if len(data) != offset - start or not data.endswith(b"\n"):
+        return None
+    return data[:-1].rsplit(b"\n", 1)[-1]
+
+
+def tail_lines(file, count, block_size=TAIL_BLOCK_SIZE):
+    # Seek backward from EOF in blocks until ``count`` lines are found, so
+    # the cost depends on the amount of history, not on the file size.
+    # Leaves the file positioned at the EOF it measured.
+    end = file.seek(0, os.SEEK_END)
+    if count <= 0 or end == 0:
+        return []
+
+    position = end
+    data = b""
+    # One extra newline is needed to know the oldest line is complete
+    while position > 0 and data.count(b"\n") <= count:
+        step = min(block_size, position)
+        position -= step
+        file.seek(position)
+        data = file.read(step) + data
+
+    file.seek(end)
+    lines = data.splitlines()
+    if position > 0:
+        lines = lines[1:]  # First line may be cut in half
+    return [line.decode("utf-8", errors="replace").strip() for line in lines[-count:]]
+
+
+class TailedFile:
+    """Follows a single file across appends, rotation and truncation."""
+
+    def __init__(self, filepath):
         self.filepath = filepath
+        self.file = None
+        self.inode = None
+        self.pending = b""
+        self.last_line = b""
+        self.error = None  # why the last open failed, other than a missing file
+
+    def open(self):
+        try:
+            self.file = open(self.filepath, "rb")
+        except FileNotFoundError:
+            self.file = None
+            return False
+        except OSError as e:
+            # A directory, no permission, ...: this file can't be followed
+            self.file = None
+            self.error = e
+            return False
+        self.error = None
+        stat = os.fstat(self.file.fileno())
+        self.inode = (stat.st_dev, stat.st_ino)
+        self.pending = b""
+        self.last_line = b""
+        return True
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def read_lines(self, max_bytes=READ_CHUNK_SIZE):
+        if self.file is None:
+            return []
+        data = self.file.read(max_bytes)
+        if not data:
+            return []
+
+        # Hold back a trailing partial line until its newline arrives
+        data = self.pending + data
+        chunks = data.split(b"\n")
+        self.pending = chunks.pop()
+        if chunks:
+            self.last_line = chunks[-1]
+        return [chunk.decode("utf-8", errors="replace").strip() for chunk in chunks]
+
+    def partial_line(self):
+        # The held-back unterminated last line, for a pass that won't wait
+        # for its newline. It stays out of the checkpoint, so a resumed run
+        # reads it again once it is complete
+        if not self.pending.strip():
+            return None
+        return self.pending.decode("utf-8", errors="replace").strip()
+
+    def resume_at(self, offset, expected_hash):
+        # Position after the checkpointed line if it is still there;
+        # otherwise (truncated or rewritten) start from the top
+        line = line_before(self.file, offset)
+        if line is not None and line_hash(line) == expected_hash:
+            self.file.seek(offset)
+            self.last_line = line
+            return True
+        self.file.seek(0)
+        return False
+
+    def mark_position(self):
+        # Remember the line before the current position (after a seek that
+        # skipped read_lines, e.g. history replay) for the next checkpoint
+        position = self.file.tell()
+        self.last_line = line_before(self.file, position) or b""
+        self.file.seek(position)
+
+    def checkpoint(self):
+        # (device, inode, offset, line_hash) of everything handed out so far
+        if self.file is None:
+            return None
+        offset = self.file.tell() - len(self.pending)
+        return (*self.inode, offset, line_hash(self.last_line))
+
+    def check_rotation(self):
+        # Returns lines still unread in a file that was rotated away
+        if self.file is None:
+            self.open()
+            return []
+
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            return []  # Rotated away, new file not created yet
+
+        if (stat.st_dev, stat.st_ino) != self.inode:
+            # logrotate (rename + create): finish the old file, then switch
+            leftover = self.read_lines()
+            self.close()
+            self.open()
+            return leftover
+
+        if stat.st_size < self.file.tell():
+            # copytruncate: start again from the top
+            self.file.seek(0)
+            self.pending = b""
+        return []
+
+    def poll(self):
+        lines = self.check_rotation()
+        lines.extend(self.read_lines())
+        return lines
+
+
+class PollingBackend:
+    # No change events: the caller polls every file each POLL_INTERVAL
+    def __init__(self, filepaths):
+        self.filepaths = filepaths
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """Linux inotify via ctypes; watches parent directories so renames and
+    re-creations are reported alongside writes. The caller waits for ``fd``
+    to become readable and then calls ``read_events``."""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+
+    MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM
+            | IN_MOVED_TO | IN_CREATE | IN_DELETE)
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, filepaths):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.filepaths = filepaths
+        self.watches = {}  # wd -> {basename: filepath}
+        by_dir = {}
+        for path in filepaths:
+            directory, name = os.path.split(os.path.abspath(path))
+            by_dir.setdefault(directory, {})[name] = path
+
+        for directory, names in by_dir.items():
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {directory}")
+            self.watches[wd] = names
+
+    def read_events(self):
+        # Non-blocking: paths with pending events
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                return self.filepaths
+            path = self.watches.get(wd, {}).get(name)
+            if path:
+                changed.add(path)
+        return [path for path in self.filepaths if path in changed]
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_backend(filepaths):
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyBackend(filepaths)
+        except OSError:
+            pass
+    return PollingBackend(filepaths)
+
+
+class LogMonitor:
+    """Opens, positions and checkpoints a set of watched files; the tailing
+    itself runs in AsyncIngest.
+
+    ``callback(line, filepath)`` gets the lines read while opening: history,
+    archives and rotations caught up on. With a ``checkpoints`` store, a
+    file with a saved position resumes there instead of replaying history
+    or reading from the start, and ``save_checkpoints`` writes positions at
+    most every CHECKPOINT_INTERVAL seconds.
+    """
+
+    def __init__(self, filepaths, callback, history_lines=HISTORY_LINES,
+                 from_start=False, follow=True, checkpoints=None):
+        # from_start: read whole files instead of replaying history_lines
+        # follow: keep watching after the initial catch-up
+        self.filepaths = list(filepaths)
+        self.checkpoints = checkpoints
+        self.last_checkpoint = 0.0
+        self.saved = {}  # path -> last checkpoint written
         self.callback = callback
+        self.history_lines = history_lines
+        self.from_start = from_start
+        self.follow = follow
         self.running = True
-        self.paused = False
+        self.skipped = []  # (path, error) for files open_sources left out
 
-    def stop(self):
-        self.running = False
+    def _load_history(self, tail):
+        # Load the last lines (history), then continue from EOF
+        for line in tail_lines(tail.file, self.history_lines):
+            self.callback(line, tail.filepath)
+        if self.checkpoints:
+            tail.mark_position()
 
-    def pause(self):
-        self.paused = True
+    def _read_archive(self, path):
+        # Compressed files don't grow: stream them once and don't watch them
+        lines = iter_lines(path)
+        if not self.from_start:
+            lines = deque(lines, maxlen=self.history_lines)
+        for line in lines:
+            if not self.running:
+                break
+            self.callback(line, path)
 
-    def resume(self):
-        self.paused = False
+    def _resume(self, tail):
+        # True when ``tail`` was positioned from its checkpoint; whatever was
+        # written while we were down is then read by the normal catch-up
+        saved = self.checkpoints.load(os.path.abspath(tail.filepath))
+        if saved is None:
+            return False
+        device, inode, offset, expected_hash = saved
 
-    def start(self):
-        with open(self.filepath, "r") as file:
+        if (device, inode) == tail.inode:
+            tail.resume_at(offset, expected_hash)
+            return True
 
-            # Load last 50 lines (history)
-            lines = file.readlines()
-            for line in lines[-50:]:
-                self.callback(line.strip())
+        # Rotated while we were down: finish the old file from the saved
+        # offset, read any newer rotations whole, then the live file
+        members = [m for m in rotation_set(tail.filepath)
+                   if os.path.abspath(m) != os.path.abspath(tail.filepath)]
+        for position, member in enumerate(members):
+            if is_compressed(member):
+                continue
+            try:
+                stat = os.stat(member)
+            except OSError:
+                continue
+            if (stat.st_dev, stat.st_ino) == (device, inode):
+                self._catch_up(member, tail.filepath, offset, expected_hash)
+                for newer in members[position + 1:]:
+                    self._catch_up(newer, tail.filepath)
+                break
+        tail.file.seek(0)
+        return True
 
-            # Follow file for new logs
-            while self.running:
-                if self.paused:
-                    time.sleep(0.5)
-                    continue
+    def _catch_up(self, path, live, offset=0, expected_hash=None):
+        # Read a rotated-away file to its end under the live file's name
+        if is_compressed(path):
+            for line in iter_lines(path):
+                self.callback(line, live)
+            return
+        old = TailedFile(path)
+        if not old.open():
+            return
+        try:
+            if offset:
+                old.resume_at(offset, expected_hash)
+            lines = old.read_lines()
+            while lines and self.running:
+                for line in lines:
+                    self.callback(line, live)
+                lines = old.read_lines()
+            if old.pending:
+                self.callback(old.pending.decode("utf-8", errors="replace").strip(), live)
+        finally:
+            old.close()
 
-                line = file.readline()
-                if not line:
-                    time.sleep(0.3)
-                    continue
+    def save_checkpoints(self, tails, force=False):
+        now = time.time()
+        if not force and now - self.last_checkpoint < CHECKPOINT_INTERVAL:
+            return
+        self.last_checkpoint = now
+        rows = []
+        for path, tail in tails.items():
+            state = tail.checkpoint()
+            if state and self.saved.get(path) != state:
+                self.saved[path] = state
+                rows.append((os.path.abspath(path), *state))
+        if rows:
+            self.checkpoints.save_many(rows)
 
-                self.callback(line.strip())
+    def open_sources(self):
+        # Streams compressed archives, then opens each watched file and
+        # positions it (checkpoint, history replay or start of file).
+        # Returns {path: TailedFile}. A file that can't be read is left out
+        # and listed in ``skipped`` as (path, error); the others carry on.
+        tails = {}
+        for path in self.filepaths:
+            if is_compressed(path):
+                try:
+                    self._read_archive(path)
+                except (OSError, EOFError) as e:
+                    self.skipped.append((path, e))
+                continue
+            tail = TailedFile(path)
+            if tail.open():
+                # A saved position wins over from_start, which then only
+                # applies to files seen for the first time
+                if not (self.checkpoints and self._resume(tail)) and not self.from_start:
+                    self._load_history(tail)
+            elif tail.error is not None:
+                self.skipped.append((path, tail.error))
+                continue
+            tails[path] = tail  # a missing file is picked up once it appears
+        return tails
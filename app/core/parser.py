@@ -1,26 +1,194 @@
+import calendar
 import re
+import time
+from datetime import datetime
 
-LOG_PATTERNS = [
-    # Full timestamped logs
-    re.compile(
-        r'(?P<timestamp>\d{4}-\d{2}-\d{2} [\d:]+)\s+\[(?P<level>INFO|WARNING|ERROR|CRITICAL)\]\s+(?P<message>.+)'
-    ),
-    # Simple logs: [LEVEL] message
-    re.compile(
-        r'\[(?P<level>INFO|WARNING|ERROR|CRITICAL)\]\s+(?P<message>.+)'
-    ),
-    # Plain logs: LEVEL message
-    re.compile(
-        r'(?P<level>INFO|WARNING|ERROR|CRITICAL)\s+(?P<message>.+)'
-    )
-]
+from utils.constants import LEVEL_ALIASES, LOG_LEVELS
 
+_LEVELS = "|".join(LOG_LEVELS)
+_LEVEL_SET = frozenset(LOG_LEVELS)
 
-def parse_log_line(line: str):
-    for pattern in LOG_PATTERNS:
+# Upper-cased spelling -> level
+LEVEL_NAMES = {**{level: level for level in LOG_LEVELS}, **LEVEL_ALIASES}
+# Any spelling in any case, longest first so "ERROR" wins over "ERR"
+_ANY_LEVEL = "(?i:" + "|".join(sorted(LEVEL_NAMES, key=len, reverse=True)) + ")"
+
+
+def normalize_level(name):
+    # "warn", "Error", "FATAL" -> one of LOG_LEVELS; None when unknown
+    if name in _LEVEL_SET:
+        return name
+    return LEVEL_NAMES.get(str(name).upper())
+
+
+# Full timestamped logs: 2026-01-02 18:40:01 [LEVEL] message
+TIMESTAMPED_PATTERN = re.compile(
+    rf'(?P<timestamp>\d{{4}}-\d{{2}}-\d{{2}} [\d:]+)\s+\[(?P<level>{_ANY_LEVEL})\]\s+(?P<message>.+)'
+)
+
+# Simple logs: [LEVEL] message. Bracketed levels may be spelled any way
+BRACKETED_PATTERN = re.compile(rf'\[(?P<level>{_ANY_LEVEL})\]\s+(?P<message>.+)')
+# Plain logs: LEVEL message. A bare word must be one of LOG_LEVELS
+PLAIN_PATTERN = re.compile(rf'(?P<level>{_LEVELS})\s+(?P<message>.+)')
+
+# In order of precedence: a timestamped level anywhere in the line beats a
+# bracketed one, which beats a bare word; within a shape the leftmost wins.
+# "INFO something [ERROR] x" is therefore an ERROR line
+LOG_PATTERNS = [TIMESTAMPED_PATTERN, BRACKETED_PATTERN, PLAIN_PATTERN]
+
+
+# 2026-01-02 18:40:01, 2026-01-02T18:40:01.250, 2026-01-02 18:40:01,250+02:00, 2026/01/02 18:40:01
+TIMESTAMP_PATTERN = re.compile(
+    r'(\d{4})[-/](\d{2})[-/](\d{2})[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d+))?)?\s*(Z|[+-]\d{2}:?\d{2})?'
+)
+# Common Log Format (nginx, Apache): 02/Jan/2026:18:40:01 +0000
+CLF_TIMESTAMP_PATTERN = re.compile(
+    r'(\d{2})/([A-Z][a-z]{2})/(\d{4}):(\d{2}):(\d{2}):(\d{2})(?:\s*([+-]\d{4}))?'
+)
+_MONTHS = {name: f"{number:02d}" for number, name in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+
+# "YYYY-MM-DD HH:MM" (+ zone) -> epoch of that minute. Lines from one file
+# share their minute prefix, so the calendar work runs once per minute
+_MINUTE_CACHE = {}
+_MINUTE_CACHE_SIZE = 4096
+
+
+def _minute_epoch(key, year, month, day, hour, minute, zone):
+    try:
+        moment = datetime(int(year), int(month), int(day), int(hour), int(minute))
+    except ValueError:
+        return None
+    if zone is None:
+        base = time.mktime(moment.timetuple())  # local time, like the rest of the app
+    else:
+        base = float(calendar.timegm(moment.timetuple()))
+        if zone != "Z":
+            digits = zone[1:].replace(":", "")
+            offset = int(digits[:2]) * 3600 + int(digits[2:]) * 60
+            base += -offset if zone[0] == "+" else offset
+    if len(_MINUTE_CACHE) >= _MINUTE_CACHE_SIZE:
+        _MINUTE_CACHE.clear()
+    _MINUTE_CACHE[key] = base
+    return base
+
+
+def parse_timestamp(text):
+    # Epoch seconds for a timestamp string, or None when it is not one
+    if not text:
+        return None
+    if len(text) == 19 and text[16] == ":":
+        # Fast path: "2026-01-02 18:40:01", the shape TIMESTAMPED_PATTERN captures
+        base = _MINUTE_CACHE.get(text[:16])
+        seconds = text[17:]
+        if base is not None and seconds.isdigit():
+            return base + int(seconds)
+
+    match = TIMESTAMP_PATTERN.match(text)
+    if match:
+        year, month, day, hour, minute, seconds, fraction, zone = match.groups()
+    else:
+        match = CLF_TIMESTAMP_PATTERN.match(text)
+        if not match or match.group(2) not in _MONTHS:
+            return None
+        day, month, year, hour, minute, seconds, zone = match.groups()
+        month, fraction = _MONTHS[month], None
+    key = text[:16] if zone is None and text[10:11] == " " else (f"{year}-{month}-{day} {hour}:{minute}", zone)
+    base = _MINUTE_CACHE.get(key)
+    if base is None:
+        base = _minute_epoch(key, year, month, day, hour, minute, zone)
+        if base is None:
+            return None
+    value = base + int(seconds or 0)
+    if fraction:
+        value += int(fraction) / 10 ** len(fraction)
+    return value
+
+
+class LogRecord:
+    __slots__ = ("timestamp", "level", "message")
+
+    def __init__(self, level, message, timestamp=""):
+        self.level = level
+        self.message = message
+        self.timestamp = timestamp
+
+    @property
+    def time(self):
+        # Event time in epoch seconds, or None without a parsable timestamp
+        return parse_timestamp(self.timestamp)
+
+    def __repr__(self):
+        return f"LogRecord({self.level!r}, {self.message!r}, timestamp={self.timestamp!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, LogRecord):
+            return NotImplemented
+        return (self.level, self.message, self.timestamp) == (other.level, other.message, other.timestamp)
+
+
+def _parse_combined(line):
+    # Most unparsable lines (stack traces, continuations) mention no level
+    # at all; rejecting them with substring checks is far cheaper than a
+    # failed regex search over the whole line
+    if "[" not in line:
+        # Without a bracket only the plain shape can match
+        for level in LOG_LEVELS:
+            if level in line:
+                break
+        else:
+            return None
+        match = PLAIN_PATTERN.search(line)
+        if not match:
+            return None
+        level, message = match.groups()
+        return LogRecord(level, message)
+
+    match = TIMESTAMPED_PATTERN.search(line)
+    if match:
+        timestamp, level, message = match.groups()
+        return LogRecord(normalize_level(level), message, timestamp)
+    for pattern in (BRACKETED_PATTERN, PLAIN_PATTERN):
         match = pattern.search(line)
         if match:
-            data = match.groupdict()
-            data.setdefault("timestamp", "")
-            return data
+            level, message = match.groups()
+            return LogRecord(normalize_level(level), message)
     return None
+
+
+def parse_log_line(line: str):
+    if not line:
+        return None
+
+    first = line[0]
+    if first == "[":
+        # Fast path: [LEVEL] message, unless a later bracket could hold a
+        # timestamped level, which takes precedence
+        end = line.find("] ", 1, 11)
+        if end > 0 and line.find("[", end) < 0:
+            level = normalize_level(line[1:end])
+            message = line[end + 2:].lstrip()
+            if message and level:
+                return LogRecord(level, message)
+    elif first.isdigit():
+        # Fast path: timestamped line
+        match = TIMESTAMPED_PATTERN.match(line)
+        if match:
+            timestamp, level, message = match.groups()
+            return LogRecord(normalize_level(level), message, timestamp)
+    else:
+        # Fast path: LEVEL message, when no bracketed level can follow
+        level, sep, rest = line.partition(" ")
+        if sep and level in _LEVEL_SET and "[" not in rest:
+            message = rest.lstrip()
+            if message:
+                return LogRecord(level, message)
+
+    return _parse_combined(line)
+
+
+def parse_many(lines):
+    # Bulk variant for backlogs; the result is aligned with ``lines`` and
+    # holds None for lines that could not be parsed
+    parse = parse_log_line
+    return [parse(line) for line in lines]
@@ -0,0 +1,201 @@
+# app/core/pipeline.py
+import time
+from collections import Counter
+
+from core.formats import FileFormats
+from core.metrics import metrics
+from core.parser import LogRecord
+from core.detector import Detector
+from core.store import LogStore
+from utils.constants import LOG_LEVELS
+
+PARSE_SAMPLE_EVERY = 64  # with metrics on, one line in this many is timed on its own
+
+
+class Pipeline:
+    """Parse -> store -> count -> detect -> persist, shared by the GUI and
+    the headless runner. Call ``process`` with batches of (line, filepath)."""
+
+    def __init__(self, store=None, detector=None, database=None, history=None,
+                 templates=None, rollups=None, formats=None):
+        self.store = store if store is not None else LogStore()
+        self.detector = detector if detector is not None else Detector()
+        self.database = database
+        self.history = history
+        self.templates = templates  # optional TemplateMiner
+        self.rollups = rollups      # optional Rollups (trend chart)
+        self.reorder = None         # optional ReorderBuffer (merged timeline)
+        self.formats = formats if formats is not None else FileFormats()
+        self.filter = None
+        self.reset()
+
+    def reset(self):
+        self.store.clear()
+        self.detector.reset()
+        if self.templates is not None:
+            self.templates.clear()
+        if self.rollups is not None:
+            self.rollups.clear()
+        if self.reorder is not None:
+            self.reorder.flush()
+        self.formats.clear()
+        self.level_counts = {level: 0 for level in LOG_LEVELS}
+        self.lines_seen = 0
+        self.unparsed = 0
+
+    def set_filter(self, log_filter):
+        # Text filter evaluated once per line at ingest; changing it re-flags
+        # the retained lines in one pass instead of re-parsing anything
+        self.filter = log_filter if log_filter is not None and log_filter.active else None
+        return self.store.apply_filter(self.filter.matches if self.filter else None)
+
+    @property
+    def pending(self):
+        # Lines held back by the reorder buffer
+        return len(self.reorder) if self.reorder is not None else 0
+
+    def process(self, batch):
+        # Returns (accepted, alerts); accepted holds (record, filepath, store index)
+        parsed = self._parse(batch)
+        if metrics.enabled and batch:
+            self._sample_parse_latency(batch)
+
+        if self.reorder is not None:
+            # Call with an empty batch now and then so held lines come out
+            reorder = self.reorder
+            now = time.time()
+            for item in parsed:
+                reorder.push(item[1], item[2], item, now)
+            parsed = reorder.pop_ready(now)
+        return self._accept(parsed, len(parsed))
+
+    def _parse(self, batch):
+        # Lines arrive in runs per source, so the parser only changes hands
+        # at run boundaries
+        parser_for = self.formats.parser_for
+        parsed = []
+        append = parsed.append
+        current = parse = None
+        for line, filepath in batch:
+            if filepath != current:
+                current = filepath
+                parse = parser_for(filepath, batch)
+            append((line, filepath, parse(line)))
+        return parsed
+
+    def _sample_parse_latency(self, batch):
+        # Times sampled lines one by one (parsing them a second time), so
+        # the histogram holds per-line latencies rather than batch averages
+        parser_for = self.formats.parser_for
+        clock = time.perf_counter
+        for line, filepath in batch[::PARSE_SAMPLE_EVERY]:
+            parse = parser_for(filepath, batch)
+            start = clock()
+            parse(line)
+            metrics.observe("parse_line", clock() - start)
+
+    def process_records(self, parsed):
+        # Already parsed (line, filepath, record), e.g. from timeline.merge_parsed
+        parsed = list(parsed)
+        return self._accept(parsed, len(parsed))
+
+    def flush(self):
+        # Releases every line the reorder buffer still holds
+        if not self.pending:
+            return [], []
+        parsed = self.reorder.flush()
+        return self._accept(parsed, len(parsed))
+
+    def process_parsed(self, filepath, rows, line_count):
+        # Pre-parsed input (bulk import): rows of (line, level, timestamp,
+        # message) in file order, out of ``line_count`` lines read
+        return self._accept(
+            ((line, filepath, LogRecord(level, message, timestamp))
+             for line, level, timestamp, message in rows),
+            line_count
+        )
+
+    def _accept(self, parsed, line_count):
+        store = self.store
+        detector = self.detector
+        level_counts = self.level_counts
+        file_id = store.file_id
+        match = self.filter.matches if self.filter else None
+        accepted = []
+        alerts = []
+
+        timed = metrics.enabled
+        if timed:
+            start = time.perf_counter()
+
+        for line, filepath, record in parsed:
+            if not record:
+                continue
+
+            level = record.level
+            if match is None:
+                index = store.append(line, level, file_id(filepath))
+            else:
+                index = store.append(line, level, file_id(filepath), visible=match(line))
+            accepted.append((record, filepath, index))
+            level_counts[level] += 1
+
+        if timed:
+            metrics.observe("store_batch", time.perf_counter() - start)
+            start = time.perf_counter()
+
+        # Event time of each line, so imported, resumed or replayed backlogs
+        # are judged (and rolled up) over when they happened. Arrival time is
+        # the fallback, also for lines dated in the future
+        now = time.time()
+        times = []
+        for record, _, _ in accepted:
+            when = record.time if record.timestamp else None
+            times.append(now if when is None or when > now else when)
+
+        for (record, filepath, _), when in zip(accepted, times):
+            alert = detector.process(record.level, filepath, when)
+            if alert:
+                alerts.append(alert)
+
+        unparsed = line_count - len(accepted)
+        self.lines_seen += line_count
+        self.unparsed += unparsed
+        if timed:
+            metrics.observe("detect_batch", time.perf_counter() - start)
+            metrics.incr("lines", line_count)
+            metrics.incr("unparsed", unparsed)
+
+        if self.templates is not None and accepted:
+            if timed:
+                start = time.perf_counter()
+            add = self.templates.add
+            for record, _, _ in accepted:
+                add(record.level, record.message, now)
+            if timed:
+                metrics.observe("template_batch", time.perf_counter() - start)
+
+        if self.rollups is not None and accepted:
+            # One increment per (file, level, bucket) per batch, not per line
+            width = self.rollups.resolution
+            counts = Counter()
+            for (record, filepath, _), when in zip(accepted, times):
+                counts[filepath, record.level, when - when % width] += 1
+            self.rollups.add_counts(counts, now)
+
+        if self.history and accepted:
+            self.history.add_records((record, filepath) for record, filepath, _ in accepted)
+
+        if self.database:
+            for alert in alerts:
+                # Queued for the background writer; never blocks the caller
+                self.database.save_alert(alert["level"], alert["message"], alert["count"])
+
+        return accepted, alerts
+
+    def close(self):
+        self.flush()
+        if self.database:
+            self.database.close()  # flushes queued alerts
+        if self.history:
+            self.history.close()
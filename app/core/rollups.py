@@ -0,0 +1,141 @@
+# app/core/rollups.py
+# Per-level counts in fixed time buckets at several resolutions, so trend
+# charts read a few thousand buckets instead of every retained line
+import math
+import time
+from array import array
+
+from utils.constants import LOG_LEVELS, ROLLUP_TIERS, TREND_MAX_POINTS
+
+_LEVEL_INDEX = {level: index for index, level in enumerate(LOG_LEVELS)}
+
+
+class RollupSeries:
+    """One resolution: ``size`` buckets of ``width`` seconds per level, in
+    ring buffers of unsigned ints. Buckets are zeroed as time moves past
+    them; counts older than the ring are dropped."""
+
+    __slots__ = ("width", "size", "counts", "newest")
+
+    def __init__(self, width, size):
+        self.width = width
+        self.size = size
+        self.counts = [array("I", bytes(4 * size)) for _ in LOG_LEVELS]
+        self.newest = None  # absolute number of the newest bucket
+
+    def _advance(self, bucket):
+        if self.newest is None:
+            self.newest = bucket
+            return
+        gap = bucket - self.newest
+        if gap <= 0:
+            return
+        size = self.size
+        if gap >= size:
+            for column in self.counts:
+                column[:] = array("I", bytes(4 * size))
+        else:
+            for number in range(self.newest + 1, bucket + 1):
+                slot = number % size
+                for column in self.counts:
+                    column[slot] = 0
+        self.newest = bucket
+
+    def add(self, level_index, count, when):
+        bucket = int(when // self.width)
+        self._advance(bucket)
+        if bucket <= self.newest - self.size:
+            return  # older than the ring
+        self.counts[level_index][bucket % self.size] += count
+
+    def window(self, first, last, level_index):
+        # Counts for absolute buckets first..last (inclusive), zero outside the ring
+        newest = self.newest
+        column = self.counts[level_index]
+        size = self.size
+        values = []
+        for number in range(first, last + 1):
+            if newest is None or number > newest or number <= newest - size:
+                values.append(0)
+            else:
+                values.append(column[number % size])
+        return values
+
+
+class Rollups:
+    """Trend data for the whole session and for each source.
+
+    Every tier in ROLLUP_TIERS is updated on ``add`` (a handful of array
+    increments per batch and bucket, not per line); ``trend`` reads the finest tier
+    that covers the requested span and sums neighbouring buckets when that
+    would still exceed ``max_points``.
+    """
+
+    def __init__(self, tiers=ROLLUP_TIERS):
+        self.tiers = tuple(tiers)
+        self.resolution = self.tiers[0][0]  # seconds per bucket in the finest tier
+        self.clear()
+
+    def clear(self):
+        self.total = self._series()
+        self.files = {}  # filepath -> tier list
+
+    def _series(self):
+        return [RollupSeries(width, size) for width, size in self.tiers]
+
+    def add(self, filepath, level, count, when=None, now=None):
+        now = time.time() if now is None else now
+        if when is None or when > now:
+            # A line dated ahead of its arrival (clock skew, a bad date) must
+            # not move the ring past now, which would push out current counts
+            when = now
+        index = _LEVEL_INDEX[level]
+        series = self.files.get(filepath)
+        if series is None:
+            series = self.files[filepath] = self._series()
+        for tier in self.total:
+            tier.add(index, count, when)
+        for tier in series:
+            tier.add(index, count, when)
+
+    def add_counts(self, counts, now=None):
+        # counts: {(filepath, level, when): n} for one batch, ``when`` being
+        # a time in the bucket the lines fall in (see ``resolution``)
+        now = time.time() if now is None else now
+        for (filepath, level, when), count in counts.items():
+            self.add(filepath, level, count, when, now)
+
+    def trend(self, span, levels=None, filepath=None, max_points=TREND_MAX_POINTS, now=None):
+        """Returns (bucket_seconds, starts, {level: counts}) for the last
+        ``span`` seconds, oldest first; ``starts`` are bucket start times."""
+        now = time.time() if now is None else now
+        series = self.total if filepath is None else self.files.get(filepath, self._series())
+
+        tier = series[-1]
+        for candidate in series:
+            if candidate.width * candidate.size >= span:
+                tier = candidate
+                break
+
+        width = tier.width
+        last = int(now // width)
+        points = min(tier.size, max(1, math.ceil(span / width)))
+        first = last - points + 1
+        factor = max(1, math.ceil(points / max_points))
+
+        levels = LOG_LEVELS if levels is None else [level for level in LOG_LEVELS if level in levels]
+        result = {}
+        for level in levels:
+            values = tier.window(first, last, _LEVEL_INDEX[level])
+            if factor > 1:
+                # Downsample: sum groups of ``factor`` buckets, aligned to the
+                # newest; a partial group at the old end is left out
+                offset = len(values) % factor
+                values = [sum(values[i:i + factor]) for i in range(offset, len(values), factor)]
+            result[level] = values
+
+        bucket = width * factor
+        count = len(next(iter(result.values()))) if result else 0
+        end = (last + 1) * width
+        starts = [end - (count - i) * bucket for i in range(count)]
+        return bucket, starts, result
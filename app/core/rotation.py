@@ -0,0 +1,85 @@
+# app/core/rotation.py
+# Compressed files and logrotate sets (app.log, app.log.1, app.log.2.gz, ...)
+import bz2
+import gzip
+import lzma
+import os
+import re
+
+OPENERS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+# What may follow the base name: ".3" or "-20260102", then a compression suffix
+_ROTATED_SUFFIX = re.compile(r"(?:\.(\d+)|-(\d{8,10}))?(\.gz|\.bz2|\.xz)?")
+
+
+def is_compressed(filepath):
+    return os.path.splitext(filepath)[1].lower() in OPENERS
+
+
+def open_log(filepath):
+    # Binary stream; compressed files are decompressed incrementally
+    opener = OPENERS.get(os.path.splitext(filepath)[1].lower(), open)
+    return opener(filepath, "rb")
+
+
+def iter_lines(filepath):
+    with open_log(filepath) as f:
+        for line in f:
+            yield line.decode("utf-8", errors="replace").strip()
+
+
+def base_path(filepath):
+    # "logs/app.log.2.gz" -> "logs/app.log"
+    directory, name = os.path.split(filepath)
+    for extension in OPENERS:
+        if name.lower().endswith(extension):
+            name = name[:-len(extension)]
+            break
+    name = re.sub(r"(?:\.\d+|-\d{8,10})$", "", name)
+    return os.path.join(directory, name)
+
+
+def rotation_set(filepath):
+    # Every member of the set ``filepath`` belongs to, oldest first; the
+    # live (unsuffixed) file comes last
+    base = base_path(filepath)
+    directory, base_name = os.path.split(base)
+    members = []
+    for entry in os.listdir(directory or "."):
+        if not entry.startswith(base_name):
+            continue
+        match = _ROTATED_SUFFIX.fullmatch(entry[len(base_name):])
+        if not match:
+            continue
+        number, date, _ = match.groups()
+        if number:
+            key = (1, -int(number), "")   # app.log.9 is older than app.log.1
+        elif date:
+            key = (0, 0, date)            # dateext: oldest date first
+        else:
+            key = (2, 0, entry)           # the live file, or a stray app.log.gz
+        members.append((key, os.path.join(directory, entry)))
+    members.sort()
+    return [path for _, path in members]
+
+
+def iter_rotation_set(filepath):
+    # One logical stream over the whole set, without temporary files
+    for member in rotation_set(filepath):
+        yield from iter_lines(member)
+
+
+def expand_rotation_sets(filepaths):
+    # [(member, logical path), ...] with each set's members oldest first
+    expanded, seen = [], set()
+    for filepath in filepaths:
+        base = base_path(filepath)
+        if base in seen:
+            continue
+        seen.add(base)
+        expanded.extend((member, base) for member in rotation_set(filepath))
+    return expanded
@@ -0,0 +1,197 @@
+# app/core/store.py
+import time
+from array import array
+
+from utils.constants import LOG_LEVELS, STORE_CAPACITY
+
+LEVEL_CODES = {level: code for code, level in enumerate(LOG_LEVELS)}
+
+
+class LogStore:
+    """Fixed-capacity ring buffer of parsed log lines.
+
+    Columns are kept in parallel arrays: the raw line (``str``), the level
+    as a one-byte code, the source file as a two-byte id into an interned
+    filename table, the ingest time as a double and a one-byte flag caching
+    whether the line passes the current text filter. Appending is O(1);
+    once full, the oldest line is overwritten.
+
+    Memory per retained line is roughly ``8 + sizeof(line) + 12`` bytes
+    (list slot, the line string itself, level byte, file id, time, filter
+    flag), i.e. about ``69 + len(line)`` for ASCII text. The previous ``all_logs`` list held
+    a tuple plus a fresh ``"<filename> | <line>"`` string per entry,
+    about ``120 + len(filename) + len(line)`` bytes.
+    """
+
+    def __init__(self, capacity=STORE_CAPACITY):
+        self.capacity = capacity
+        self.lines = [None] * capacity
+        self.levels = bytearray(capacity)
+        self.files = array("H", bytes(2 * capacity))
+        self.times = array("d", bytes(8 * capacity))
+        self.visible = bytearray(b"\x01") * capacity
+        self.filenames = []
+        self.file_ids = {}
+        self.start = 0
+        self.size = 0
+        self.evicted = 0
+        # Retained-line counters, kept in step with append/evict
+        self.level_counts = [0] * len(LOG_LEVELS)
+        self.file_level_counts = {}  # file id -> per-level counts
+
+    def __len__(self):
+        return self.size
+
+    def file_id(self, filepath):
+        file_id = self.file_ids.get(filepath)
+        if file_id is None:
+            file_id = len(self.filenames)
+            self.filenames.append(filepath.replace("\\", "/").split("/")[-1])
+            self.file_ids[filepath] = file_id
+            self.file_level_counts[file_id] = [0] * len(LOG_LEVELS)
+        return file_id
+
+    def append(self, line, level, file_id, when=None, visible=True):
+        # Returns the slot index the line was written to
+        capacity = self.capacity
+        if self.size < capacity:
+            index = (self.start + self.size) % capacity
+            self.size += 1
+        else:
+            index = self.start
+            self.start = (self.start + 1) % capacity
+            self.evicted += 1
+            old_code = self.levels[index]
+            self.level_counts[old_code] -= 1
+            self.file_level_counts[self.files[index]][old_code] -= 1
+
+        code = LEVEL_CODES[level]
+        self.lines[index] = line
+        self.levels[index] = code
+        self.files[index] = file_id
+        self.times[index] = time.time() if when is None else when
+        self.visible[index] = visible
+        self.level_counts[code] += 1
+        self.file_level_counts[file_id][code] += 1
+        return index
+
+    def clear(self):
+        self.lines = [None] * self.capacity
+        self.start = 0
+        self.size = 0
+        self.evicted = 0
+        self.level_counts = [0] * len(LOG_LEVELS)
+        for counts in self.file_level_counts.values():
+            counts[:] = [0] * len(LOG_LEVELS)
+
+    def apply_filter(self, match=None):
+        # Re-evaluates the cached visibility flag of every retained line;
+        # ``match(line)`` is the compiled filter, None shows everything
+        if match is None:
+            self.visible[:] = b"\x01" * self.capacity
+            return self.size
+        lines, visible = self.lines, self.visible
+        shown = 0
+        for index in self._indices():
+            flag = match(lines[index])
+            visible[index] = flag
+            shown += flag
+        return shown
+
+    def counts(self, levels=None):
+        # Retained lines per level, O(levels); levels outside ``levels`` read 0
+        return {
+            level: count if levels is None or level in levels else 0
+            for level, count in zip(LOG_LEVELS, self.level_counts)
+        }
+
+    def file_counts(self, filepath, levels=None):
+        counts = self.file_level_counts.get(self.file_ids.get(filepath))
+        if counts is None:
+            return {level: 0 for level in LOG_LEVELS}
+        return {
+            level: count if levels is None or level in levels else 0
+            for level, count in zip(LOG_LEVELS, counts)
+        }
+
+    def _indices(self, reverse=False):
+        positions = range(self.size - 1, -1, -1) if reverse else range(self.size)
+        start, capacity = self.start, self.capacity
+        for position in positions:
+            yield (start + position) % capacity
+
+    def entry(self, index):
+        return (
+            f"{self.filenames[self.files[index]]} | {self.lines[index]}",
+            LOG_LEVELS[self.levels[index]],
+        )
+
+    def snapshot(self):
+        # Point-in-time copy for readers on other threads (exports); copying
+        # the columns is a few memcpys, the line strings themselves are shared
+        copy = LogStore.__new__(LogStore)
+        copy.__dict__.update(self.__dict__)
+        copy.lines = self.lines[:]
+        copy.levels = self.levels[:]
+        copy.files = self.files[:]
+        copy.times = self.times[:]
+        copy.visible = self.visible[:]
+        copy.filenames = self.filenames[:]
+        copy.level_counts = self.level_counts[:]
+        copy.file_level_counts = {}
+        return copy
+
+    def select(self, levels=None, since=None, until=None, visible_only=False):
+        # Yields (time, filename, level, line) oldest first
+        for _, rows in self.select_chunks(levels, since, until, visible_only):
+            yield from rows
+
+    def select_chunks(self, levels=None, since=None, until=None, visible_only=False, chunk_size=5000):
+        # Yields (rows scanned so far, matching rows) per ``chunk_size`` rows
+        # scanned, so callers can report progress however selective the filter
+        codes = None if levels is None else {LEVEL_CODES[level] for level in levels}
+        lines, level_codes, files, times = self.lines, self.levels, self.files, self.times
+        filenames, visible = self.filenames, self.visible
+        rows = []
+        scanned = 0
+        for index in self._indices():
+            scanned += 1
+            if scanned % chunk_size == 0:
+                yield scanned, rows
+                rows = []
+            if codes is not None and level_codes[index] not in codes:
+                continue
+            if visible_only and not visible[index]:
+                continue
+            when = times[index]
+            if (since is not None and when < since) or (until is not None and when > until):
+                continue
+            rows.append((when, filenames[files[index]], LOG_LEVELS[level_codes[index]], lines[index]))
+        yield scanned, rows
+
+    def iter_levels(self):
+        levels = self.levels
+        for index in self._indices():
+            yield LOG_LEVELS[levels[index]]
+
+    def tail(self, count, levels=None):
+        # Newest ``count`` visible entries whose level is in ``levels``, oldest
+        # first; checks the cached flags before building any display string
+        codes = None if levels is None else {LEVEL_CODES[level] for level in levels}
+        level_codes, visible = self.levels, self.visible
+        picked = []
+        for index in self._indices(reverse=True):
+            if len(picked) >= count:
+                break
+            if visible[index] and (codes is None or level_codes[index] in codes):
+                picked.append(index)
+        return [self.entry(index) for index in reversed(picked)]
+
+    def __iter__(self):
+        # Yields (display_line, level) oldest first
+        for index in self._indices():
+            yield self.entry(index)
+
+    def __reversed__(self):
+        for index in self._indices(reverse=True):
+            yield self.entry(index)
@@ -0,0 +1,156 @@
+# app/core/templates.py
+# Online message template mining (Drain: He et al., ICWS 2017)
+import heapq
+import re
+import time
+
+from utils.constants import (
+    TEMPLATE_CAPACITY,
+    TEMPLATE_DEPTH,
+    TEMPLATE_MAX_CHILDREN,
+    TEMPLATE_SIMILARITY,
+)
+
+WILDCARD = "<*>"
+
+# Tokens containing a digit (ids, counts, addresses, durations) are variables
+_VARIABLE = re.compile(r"\S*\d\S*")
+
+
+class Template:
+    __slots__ = ("id", "level", "tokens", "count", "first_seen", "last_seen", "leaf")
+
+    def __init__(self, template_id, level, tokens, when, leaf):
+        self.id = template_id
+        self.level = level
+        self.tokens = tokens
+        self.count = 0
+        self.first_seen = when
+        self.last_seen = when
+        self.leaf = leaf  # the tree leaf holding this template, for eviction
+
+    @property
+    def text(self):
+        return " ".join(self.tokens)
+
+    def __repr__(self):
+        return f"Template({self.id}, {self.level!r}, {self.text!r}, count={self.count})"
+
+
+class TemplateMiner:
+    """Groups messages into templates with ``<*>`` variable slots.
+
+    Messages are masked and tokenised, then routed through a fixed-depth
+    tree keyed by (level, token count) and the leading tokens. The leaf
+    holds candidate templates; the message joins the most similar one when
+    at least ``similarity`` of its tokens match, and positions that differ
+    become ``<*>``. Repeated shapes hit an exact-match cache first, so the
+    per-line cost stays flat. At most ``capacity`` templates are kept; the
+    least recently seen are evicted.
+    """
+
+    EVICT_FRACTION = 0.1
+
+    def __init__(self, depth=TEMPLATE_DEPTH, similarity=TEMPLATE_SIMILARITY,
+                 max_children=TEMPLATE_MAX_CHILDREN, capacity=TEMPLATE_CAPACITY):
+        self.prefix = max(depth - 2, 1)  # tokens used for routing
+        self.similarity = similarity
+        self.max_children = max_children
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        self.root = {}
+        self.exact = {}      # (level, masked message) -> Template
+        self.templates = {}  # id -> Template
+        self.next_id = 0
+        self.total = 0
+
+    def __len__(self):
+        return len(self.templates)
+
+    def add(self, level, message, when=None):
+        when = time.time() if when is None else when
+        masked = _VARIABLE.sub(WILDCARD, message)
+        key = (level, masked)
+
+        template = self.exact.get(key)
+        if template is None:
+            tokens = tuple(masked.split())
+            leaf = self._leaf(level, tokens)
+            template = self._match(leaf, tokens)
+            if template is None:
+                template = self._create(level, tokens, when, leaf)
+            else:
+                self._merge(template, tokens)
+            if len(self.exact) >= 4 * self.capacity:
+                self.exact.clear()
+            self.exact[key] = template
+
+        template.count += 1
+        template.last_seen = when
+        self.total += 1
+        return template
+
+    def _leaf(self, level, tokens):
+        node = self.root.setdefault((level, len(tokens)), {})
+        for token in tokens[:self.prefix]:
+            child = node.get(token)
+            if child is None:
+                # Unknown token on a crowded node shares the wildcard branch
+                if len(node) >= self.max_children:
+                    token = WILDCARD
+                child = node.setdefault(token, {})
+            node = child
+        return node.setdefault(None, [])
+
+    def _match(self, leaf, tokens):
+        if not tokens:
+            return leaf[0] if leaf else None
+        best, best_similarity, best_params = None, -1.0, -1
+        for template in leaf:
+            same = params = 0
+            for known, token in zip(template.tokens, tokens):
+                if known == WILDCARD:
+                    params += 1
+                elif known == token:
+                    same += 1
+            similarity = same / len(tokens)
+            if similarity > best_similarity or (similarity == best_similarity and params > best_params):
+                best, best_similarity, best_params = template, similarity, params
+        return best if best_similarity >= self.similarity else None
+
+    def _merge(self, template, tokens):
+        if template.tokens != tokens:
+            template.tokens = tuple(
+                known if known == token else WILDCARD
+                for known, token in zip(template.tokens, tokens)
+            )
+
+    def _create(self, level, tokens, when, leaf):
+        if len(self.templates) >= self.capacity:
+            self._evict()
+        template = Template(self.next_id, level, tokens, when, leaf)
+        self.next_id += 1
+        self.templates[template.id] = template
+        leaf.append(template)
+        return template
+
+    def _evict(self):
+        # Drop the least recently seen in one go so eviction is amortised
+        count = max(1, int(self.capacity * self.EVICT_FRACTION))
+        for template in heapq.nsmallest(count, self.templates.values(), key=lambda t: t.last_seen):
+            template.leaf.remove(template)
+            del self.templates[template.id]
+        self.exact.clear()
+
+    def recent(self, count, levels=None):
+        # Most recently seen templates whose level is in ``levels``, oldest first
+        candidates = self.templates.values()
+        if levels is not None:
+            candidates = [t for t in candidates if t.level in levels]
+        return sorted(heapq.nlargest(count, candidates, key=lambda t: t.last_seen),
+                      key=lambda t: t.last_seen)
+
+    def most_common(self, count):
+        return heapq.nlargest(count, self.templates.values(), key=lambda t: t.count)
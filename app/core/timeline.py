@@ -0,0 +1,127 @@
+# app/core/timeline.py
+# One time-ordered stream across several sources: a k-way heap merge for
+# backlogs and a bounded reorder buffer for live tailing
+import heapq
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+
+from core.bulk import iter_parsed_chunks
+from core.parser import LogRecord, parse_timestamp
+from core.rotation import expand_rotation_sets
+from utils.constants import BULK_WORKERS, REORDER_MAX_LINES, REORDER_WINDOW
+
+
+def _iter_parsed_timed(filepath, members, pool, in_flight, log_format):
+    # (time, line, filepath, record) for each line of one file, in file
+    # order, from chunks parsed in ``pool``; one None record per line that
+    # didn't parse. Lines without a timestamp (continuations, stack traces)
+    # take the time of the line before them so they stay attached to it
+    last = float("-inf")
+    for member in members:
+        for rows, line_count in iter_parsed_chunks(member, log_format=log_format,
+                                                   pool=pool, in_flight=in_flight):
+            for line, level, timestamp, message in rows:
+                if timestamp:
+                    when = parse_timestamp(timestamp)
+                    if when is not None:
+                        last = when
+                yield last, line, filepath, LogRecord(level, message, timestamp)
+            for _ in range(line_count - len(rows)):
+                yield last, "", filepath, None
+
+
+def merge_parsed(filepaths, rotated=False, workers=BULK_WORKERS, log_format=None):
+    """Yields (line, filepath, record) from all files in timestamp order.
+
+    Each file (or rotation set, oldest member first) is cut into chunks
+    parsed in one shared pool; heapq.merge then interleaves the per-file
+    streams by timestamp. Every file keeps a few chunks in flight, so all
+    of them are parsed in parallel while memory stays bounded. Files are
+    assumed to be in time order themselves; ties keep the order of
+    ``filepaths``.
+    """
+    if rotated:
+        members = {}
+        for member, path in expand_rotation_sets(filepaths):
+            members.setdefault(path, []).append(member)
+    else:
+        members = {path: [path] for path in filepaths}
+
+    workers = workers or os.cpu_count() or 1
+    in_flight = max(2, 2 * workers // max(1, len(members)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        streams = [
+            _iter_parsed_timed(path, paths, pool, in_flight, log_format)
+            for path, paths in members.items()
+        ]
+        for _, line, filepath, record in heapq.merge(*streams, key=itemgetter(0)):
+            yield line, filepath, record
+
+
+class ReorderBuffer:
+    """Holds live lines for up to ``window`` seconds and releases them in
+    timestamp order.
+
+    Lines from different files reach the ingest queue in whatever order
+    their reads complete; lines that arrive within ``window`` of each other
+    come out sorted by event time. A line is released once it has been held
+    ``window`` seconds, together with every pending line whose event time is
+    not later than its own, or when more than ``max_lines`` are pending.
+    """
+
+    def __init__(self, window=REORDER_WINDOW, max_lines=REORDER_MAX_LINES):
+        self.window = window
+        self.max_lines = max_lines
+        self.heap = []  # (event time, sequence, item)
+        self.arrivals = deque()  # (arrival time, event time, sequence), oldest first
+        self.held = set()  # sequences still in the heap
+        self.sequence = itertools.count()
+        self.last_time = {}  # source -> event time of its last timestamped line
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, source, record, item, now=None):
+        now = time.time() if now is None else now
+        when = record.time if record is not None and record.timestamp else None
+        if when is None:
+            # Untimestamped lines follow their source's last timestamped line
+            when = self.last_time.get(source, now)
+        else:
+            self.last_time[source] = when
+        sequence = next(self.sequence)
+        heapq.heappush(self.heap, (when, sequence, item))
+        self.arrivals.append((now, when, sequence))
+        self.held.add(sequence)
+
+    def pop_ready(self, now=None):
+        now = time.time() if now is None else now
+        heap, arrivals, held = self.heap, self.arrivals, self.held
+        due = now - self.window
+
+        # The latest (event time, sequence) among lines held past the
+        # window; it and everything sorting before it goes out
+        cutoff = None
+        while arrivals and arrivals[0][0] <= due:
+            _, when, sequence = arrivals.popleft()
+            if sequence in held and (cutoff is None or (when, sequence) > cutoff):
+                cutoff = (when, sequence)
+
+        released = []
+        while heap and ((cutoff is not None and heap[0][:2] <= cutoff) or len(heap) > self.max_lines):
+            _, sequence, item = heapq.heappop(heap)
+            held.discard(sequence)
+            released.append(item)
+        return released
+
+    def flush(self):
+        heap = self.heap
+        released = [heapq.heappop(heap)[2] for _ in range(len(heap))]
+        self.arrivals.clear()
+        self.held.clear()
+        self.last_time.clear()
+        return released
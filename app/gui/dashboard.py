@@ -2,12 +2,17 @@ import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from tkinter.scrolledtext import ScrolledText
 from matplotlib.figure import Figure
-from ttkbootstrap.dialogs import Messagebox
+from ttkbootstrap.dialogs import Messagebox, Querybox
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
-from utils.constants import LOG_LEVELS
-import json
-import csv
+from utils.constants import LOG_LEVELS, MAX_VIEW_LINES
+from core.filters import LogFilter
+from core.metrics import metrics
+from storage.export import export_logs, ExportCancelled
+from storage.presets import load_presets, save_presets
+import re
+import threading
+import time
 from tkinter import filedialog
 
 # Updated for a more professional palette
@@ -19,14 +24,21 @@ LOG_COLORS = {
 }
 
 class Dashboard(ttk.Frame):
-    def __init__(self, master, on_pause, on_resume, on_filter_change):
+    def __init__(self, master, on_pause, on_resume, on_filter_change, on_trend_change=None):
         super().__init__(master, padding=20)
         self.pack(fill=BOTH, expand=True)
 
         self.on_pause = on_pause
         self.on_resume = on_resume
         self.on_filter_change = on_filter_change
+        self.on_trend_change = on_trend_change
         self.paused = False
+        self.log_store = []
+        self.view_lines = 0
+        self.max_view_lines = MAX_VIEW_LINES
+        self.export_thread = None
+        self.export_cancel = None
+        self.export_state = None
 
         # --- Layout Containers ---
         self.top_row = ttk.Frame(self)
@@ -57,52 +69,93 @@ class Dashboard(ttk.Frame):
     
     
 
+    # Time range choices for exports, in seconds (None = everything)
+    EXPORT_RANGES = {
+        "All time": None,
+        "Last 15 min": 15 * 60,
+        "Last hour": 60 * 60,
+        "Last 24 h": 24 * 60 * 60,
+    }
+
     def export_csv(self):
-        if not hasattr(self, "all_logs") or not self.all_logs:
-            self.show_alert("No logs to export!")
-            return
+        self.start_export("csv", "CSV files", "Save logs as CSV")
 
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv")],
-            title="Save logs as CSV"
-        )
-        if not file_path:
-            return
+    def export_json(self):
+        self.start_export("json", "JSON files", "Save logs as JSON")
 
-        # Save logs with columns: Level, Message
-        try:
-            with open(file_path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(["Level", "Message"])
-                for line, level in self.all_logs:
-                    writer.writerow([level, line])
-            self._set_status(f"Logs exported to CSV: {file_path}", "success")
-        except Exception as e:
-            self.show_alert(f"CSV Export Failed: {e}")
+    def export_ndjson(self):
+        self.start_export("ndjson", "NDJSON files", "Save logs as NDJSON")
 
-    def export_json(self):
-        if not hasattr(self, "all_logs") or not self.all_logs:
+    def start_export(self, fmt, type_label, title):
+        if not self.log_store:
             self.show_alert("No logs to export!")
             return
+        if self.export_thread and self.export_thread.is_alive():
+            self.show_alert("An export is already running")
+            return
 
+        compressed = self.export_gzip.get()
+        extension = f".{fmt}.gz" if compressed else f".{fmt}"
         file_path = filedialog.asksaveasfilename(
-            defaultextension=".json",
-            filetypes=[("JSON files", "*.json")],
-            title="Save logs as JSON"
+            defaultextension=extension,
+            filetypes=[(type_label, f"*{extension}"), ("All files", "*.*")],
+            title=title
         )
         if not file_path:
             return
 
-        try:
-            data = [{"level": level, "message": line} for line, level in self.all_logs]
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-            self._set_status(f"Logs exported to JSON: {file_path}", "success")
-        except Exception as e:
-            self.show_alert(f"JSON Export Failed: {e}")
+        filtered = self.export_filtered.get()
+        levels = set(self.visible_levels) if filtered else None
+        window = self.EXPORT_RANGES[self.export_range.get()]
+        since = time.time() - window if window else None
+
+        # Snapshot on the UI thread; the worker never touches the live store or Tk
+        snapshot = self.log_store.snapshot()
+        self.export_cancel = threading.Event()
+        self.export_state = {"done": 0, "total": len(snapshot), "result": None}
+
+        def worker():
+            state = self.export_state
+            try:
+                rows = export_logs(
+                    snapshot, file_path, fmt=fmt, compressed=compressed,
+                    levels=levels, since=since, visible_only=filtered,
+                    progress=lambda done, total: state.update(done=done, total=total),
+                    cancel=self.export_cancel
+                )
+                state["result"] = ("success", f"Exported {rows} lines to {file_path}")
+            except ExportCancelled:
+                state["result"] = ("warning", "Export cancelled")
+            except Exception as e:
+                state["result"] = ("danger", f"{fmt.upper()} Export Failed: {e}")
+
+        self.export_thread = threading.Thread(target=worker, daemon=True)
+        self.export_thread.start()
+
+        self.export_progress.configure(value=0)
+        self.export_progress.pack(side=LEFT, padx=5)
+        self.cancel_btn.pack(side=LEFT, padx=5)
+        self._set_status(f"Exporting to {file_path}...", "info")
+        self.after(100, self._poll_export)
+
+    def _poll_export(self):
+        state = self.export_state
+        total = max(state["total"], 1)
+        self.export_progress.configure(value=100 * state["done"] / total)
+
+        if state["result"] is None:
+            self.after(100, self._poll_export)
+            return
+
+        self.export_progress.pack_forget()
+        self.cancel_btn.pack_forget()
+        style, message = state["result"]
+        self._set_status(message, style)
+
+    def cancel_export(self):
+        if self.export_cancel:
+            self.export_cancel.set()
 
-    
     def _init_controls(self):
         # Pause Button
         self.pause_btn = ttk.Button(
@@ -134,9 +187,51 @@ class Dashboard(ttk.Frame):
             command=self.export_json
         ).pack(side=LEFT, padx=5)
 
+        ttk.Button(
+            export_frame,
+            text="Export NDJSON",
+            bootstyle="info-outline",
+            width=15,
+            command=self.export_ndjson
+        ).pack(side=LEFT, padx=5)
+
+        # Export options
+        options_frame = ttk.Frame(self.left_panel)
+        options_frame.pack(side=TOP, anchor=W, pady=(5, 0))
+
+        self.export_gzip = ttk.BooleanVar(value=False)
+        self.export_filtered = ttk.BooleanVar(value=False)
+        self.export_range = ttk.StringVar(value="All time")
+
+        ttk.Checkbutton(
+            options_frame, text="gzip", variable=self.export_gzip, bootstyle="round-toggle"
+        ).pack(side=LEFT, padx=5)
+        ttk.Checkbutton(
+            options_frame, text="Filtered view only", variable=self.export_filtered, bootstyle="round-toggle"
+        ).pack(side=LEFT, padx=5)
+        ttk.Combobox(
+            options_frame,
+            textvariable=self.export_range,
+            values=list(self.EXPORT_RANGES),
+            state="readonly",
+            width=12
+        ).pack(side=LEFT, padx=5)
+
+        # Shown only while an export is running
+        self.export_progress = ttk.Progressbar(
+            options_frame, length=120, maximum=100, bootstyle="info-striped"
+        )
+        self.cancel_btn = ttk.Button(
+            options_frame,
+            text="Cancel",
+            bootstyle="danger-outline",
+            command=self.cancel_export
+        )
+
 
     def _init_filters(self):
         self.filters = {lvl: ttk.BooleanVar(value=True) for lvl in LOG_LEVELS}
+        self.visible_levels = set(LOG_LEVELS)
         
         filter_frame = ttk.Labelframe(self.left_panel, text=" Global Controls ", padding=15)
         filter_frame.pack(fill=BOTH, expand=True, padx=(0, 10))
@@ -151,9 +246,68 @@ class Dashboard(ttk.Frame):
                 text=level,
                 variable=self.filters[level],
                 bootstyle="round-toggle",
-                command=self.on_filter_change
+                command=self._on_filter_toggle
             ).pack(side=LEFT, padx=10)
 
+        # Text filters, compiled on Apply: one regex each for include and
+        # exclude (commas belong to the regex, e.g. \d{1,3}; use | for
+        # alternatives) and comma-separated keywords
+        self.text_filter = None
+        self.presets = load_presets()
+        self.include_var = ttk.StringVar()
+        self.exclude_var = ttk.StringVar()
+        self.keywords_var = ttk.StringVar()
+        self.preset_var = ttk.StringVar()
+
+        text_container = ttk.Frame(filter_frame)
+        text_container.pack(fill=X, side=TOP, pady=(10, 0))
+
+        for label, var in (("Include", self.include_var),
+                           ("Exclude", self.exclude_var),
+                           ("Keywords", self.keywords_var)):
+            ttk.Label(text_container, text=label).pack(side=LEFT, padx=(10, 2))
+            entry = ttk.Entry(text_container, textvariable=var, width=16)
+            entry.pack(side=LEFT)
+            entry.bind("<Return>", lambda _: self.apply_text_filter())
+
+        ttk.Button(
+            text_container, text="Apply", bootstyle="primary-outline", command=self.apply_text_filter
+        ).pack(side=LEFT, padx=(10, 2))
+        ttk.Button(
+            text_container, text="Clear", bootstyle="secondary-outline", command=self.clear_text_filter
+        ).pack(side=LEFT, padx=2)
+
+        # Collapse repeated message shapes into one "xN" row per template
+        self.collapsed = ttk.BooleanVar(value=False)
+        self.collapse_toggle = ttk.Checkbutton(
+            text_container,
+            text="Collapse repeats",
+            variable=self.collapsed,
+            bootstyle="round-toggle",
+            command=self.on_filter_change
+        )
+        self.collapse_toggle.pack(side=LEFT, padx=10)
+
+        preset_container = ttk.Frame(filter_frame)
+        preset_container.pack(fill=X, side=TOP, pady=(5, 0))
+
+        ttk.Label(preset_container, text="Preset").pack(side=LEFT, padx=(10, 2))
+        self.preset_box = ttk.Combobox(
+            preset_container,
+            textvariable=self.preset_var,
+            values=sorted(self.presets),
+            state="readonly",
+            width=18
+        )
+        self.preset_box.pack(side=LEFT)
+        self.preset_box.bind("<<ComboboxSelected>>", lambda _: self.load_preset())
+        ttk.Button(
+            preset_container, text="Save Preset", bootstyle="info-outline", command=self.save_preset
+        ).pack(side=LEFT, padx=(10, 2))
+        ttk.Button(
+            preset_container, text="Delete", bootstyle="danger-outline", command=self.delete_preset
+        ).pack(side=LEFT, padx=2)
+
     # def _init_controls(self):
     #     # Pause Button moved to a more prominent location
     #     self.pause_btn = ttk.Button(
@@ -165,8 +319,81 @@ class Dashboard(ttk.Frame):
     #     )
     #     self.pause_btn.pack(side=BOTTOM, anchor=W, pady=(10, 0))
 
+    def _on_filter_toggle(self):
+        # Snapshot the toggles once so per-line checks are a set lookup
+        self.visible_levels = {lvl for lvl, var in self.filters.items() if var.get()}
+        self.on_filter_change()
+
+    @staticmethod
+    def _split(text):
+        return [part.strip() for part in text.split(",") if part.strip()]
+
+    @staticmethod
+    def _join_patterns(patterns):
+        # Presets may hold several patterns; the entry shows them as one regex
+        if len(patterns) == 1:
+            return patterns[0]
+        return "|".join(f"(?:{pattern})" for pattern in patterns)
+
+    def _build_text_filter(self):
+        return LogFilter(
+            include=[self.include_var.get().strip()],
+            exclude=[self.exclude_var.get().strip()],
+            keywords=self._split(self.keywords_var.get()),
+        )
+
+    def apply_text_filter(self):
+        try:
+            log_filter = self._build_text_filter()
+        except re.error as e:
+            self.show_alert(f"Invalid regex: {e}")
+            return
+        self.text_filter = log_filter if log_filter.active else None
+        self.on_filter_change()
+
+    def clear_text_filter(self):
+        for var in (self.include_var, self.exclude_var, self.keywords_var, self.preset_var):
+            var.set("")
+        self.apply_text_filter()
+
+    def load_preset(self):
+        log_filter = self.presets.get(self.preset_var.get())
+        if log_filter is None:
+            return
+        self.include_var.set(self._join_patterns(log_filter.include))
+        self.exclude_var.set(self._join_patterns(log_filter.exclude))
+        self.keywords_var.set(", ".join(log_filter.keywords))
+        self.text_filter = log_filter if log_filter.active else None
+        self.on_filter_change()
+
+    def save_preset(self):
+        try:
+            log_filter = self._build_text_filter()
+        except re.error as e:
+            self.show_alert(f"Invalid regex: {e}")
+            return
+        name = Querybox.get_string(prompt="Preset name", title="Save filter preset",
+                                   initialvalue=self.preset_var.get(), parent=self)
+        if not name:
+            return
+        self.presets[name] = log_filter
+        self._store_presets(name)
+
+    def delete_preset(self):
+        if self.presets.pop(self.preset_var.get(), None) is not None:
+            self._store_presets("")
+
+    def _store_presets(self, selected):
+        try:
+            save_presets(self.presets)
+        except OSError as e:
+            self.show_alert(f"Could not save presets: {e}")
+            return
+        self.preset_box.configure(values=sorted(self.presets))
+        self.preset_var.set(selected)
+
     def should_display(self, level):
-        return self.filters[level].get()
+        return level in self.visible_levels
 
     # ───────────────── Counters (Metric Cards) ───────────────── #
 
@@ -210,38 +437,111 @@ class Dashboard(ttk.Frame):
 
     # ───────────────── Chart (Visual Polish) ───────────────── #
 
+    # Trend chart spans, in seconds
+    TREND_RANGES = {
+        "15 min": 15 * 60,
+        "1 hour": 60 * 60,
+        "24 hours": 24 * 60 * 60,
+        "7 days": 7 * 24 * 60 * 60,
+    }
+
+    @staticmethod
+    def _style_axes(ax):
+        ax.set_facecolor('#2b2b2b')
+        ax.tick_params(colors='white', labelsize=8)
+        ax.spines['bottom'].set_color('white')
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.spines['left'].set_color('white')
+
     def _init_chart(self):
         frame = ttk.Labelframe(self, text=" Analytics ", padding=10)
         frame.pack(fill=X, pady=10)
 
-        # Matplotlib theme integration
+        trend_bar = ttk.Frame(frame)
+        trend_bar.pack(fill=X)
+        ttk.Label(trend_bar, text="Trend").pack(side=LEFT, padx=(0, 5))
+        self.trend_range = ttk.StringVar(value="1 hour")
+        trend_box = ttk.Combobox(
+            trend_bar,
+            textvariable=self.trend_range,
+            values=list(self.TREND_RANGES),
+            state="readonly",
+            width=10
+        )
+        trend_box.pack(side=LEFT)
+        trend_box.bind("<<ComboboxSelected>>", lambda _: self.on_trend_change and self.on_trend_change())
+
+        # Matplotlib theme integration: counts on the left, trend on the right
         self.figure = Figure(figsize=(6, 2.5), dpi=100, facecolor='#2b2b2b')
-        self.ax = self.figure.add_subplot(111)
-        self.ax.set_facecolor('#2b2b2b')
-        self.ax.tick_params(colors='white', labelsize=8)
-        self.ax.spines['bottom'].set_color('white')
-        self.ax.spines['top'].set_visible(False)
-        self.ax.spines['right'].set_visible(False)
-        self.ax.spines['left'].set_color('white')
+        grid = self.figure.add_gridspec(1, 2, width_ratios=(1, 2))
+        self.ax = self.figure.add_subplot(grid[0, 0])
+        self._style_axes(self.ax)
+
+        # Artists are created once; updates only change heights and labels
+        colors = [LOG_COLORS.get(lvl, "#ffffff") for lvl in LOG_LEVELS]
+        self.bars = self.ax.bar(LOG_LEVELS, [0] * len(LOG_LEVELS), color=colors, width=0.6)
+        self.ax.set_title("Log Frequency", color='white', pad=15, fontdict={'fontsize': 10, 'fontweight': 'bold'})
+        self.bar_labels = [
+            self.ax.text(bar.get_x() + bar.get_width()/2., 0.1, '0',
+                         ha='center', va='bottom', color='white', fontsize=8)
+            for bar in self.bars
+        ]
+        self.chart_max = 1
+        self.ax.set_ylim(0, self.chart_max)
+
+        # Trend lines are created once too; updates swap their data
+        self.trend_ax = self.figure.add_subplot(grid[0, 1])
+        self._style_axes(self.trend_ax)
+        self.trend_ax.set_title("Trend", color='white', pad=15, fontdict={'fontsize': 10, 'fontweight': 'bold'})
+        self.trend_lines = {
+            level: self.trend_ax.plot([], [], color=LOG_COLORS.get(level, "#ffffff"), linewidth=1)[0]
+            for level in LOG_LEVELS
+        }
+        self.trend_max = 1
+        self.trend_ax.set_ylim(0, self.trend_max)
+        self.figure.tight_layout()
 
         self.canvas = FigureCanvasTkAgg(self.figure, frame)
         self.canvas.get_tk_widget().pack(fill=BOTH, expand=True)
 
     def update_chart(self, counts):
-        self.ax.clear()
-        levels = list(counts.keys())
-        values = list(counts.values())
-        colors = [LOG_COLORS.get(lvl, "#ffffff") for lvl in levels]
+        values = [counts.get(lvl, 0) for lvl in LOG_LEVELS]
 
-        bars = self.ax.bar(levels, values, color=colors, width=0.6)
-        self.ax.set_title("Log Frequency", color='white', pad=15, fontdict={'fontsize': 10, 'fontweight': 'bold'})
-        
-        # Add value labels on top of bars
-        for bar in bars:
-            height = bar.get_height()
-            self.ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                        f'{int(height)}', ha='center', va='bottom', color='white', fontsize=8)
+        for bar, label, value in zip(self.bars, self.bar_labels, values):
+            bar.set_height(value)
+            label.set_y(value + 0.1)
+            label.set_text(f'{int(value)}')
+
+        # Rescale in steps so the axis isn't relaid out on every update
+        peak = max(values)
+        if peak > self.chart_max or peak < self.chart_max / 4:
+            self.chart_max = max(1, int(peak * 1.5))
+            self.ax.set_ylim(0, self.chart_max)
+
+        self.canvas.draw_idle()
 
+    def update_trend(self, bucket, starts, series, now):
+        # x axis: minutes (or hours) before now; one point per bucket
+        span = self.TREND_RANGES[self.trend_range.get()]
+        unit, label = (60, "min ago") if span <= 60 * 60 else (3600, "h ago")
+        xs = [(start - now) / unit for start in starts]
+
+        peak = 0
+        for level, line in self.trend_lines.items():
+            values = series.get(level)
+            if values is None or level not in self.visible_levels:
+                line.set_visible(False)
+                continue
+            line.set_visible(True)
+            line.set_data(xs, values)
+            peak = max(peak, max(values, default=0))
+
+        self.trend_ax.set_xlim(-span / unit, 0)
+        self.trend_ax.set_xlabel(f"{label} (per {bucket:g}s)", color='white', fontsize=8)
+        if peak > self.trend_max or peak < self.trend_max / 4:
+            self.trend_max = max(1, int(peak * 1.5))
+            self.trend_ax.set_ylim(0, self.trend_max)
         self.canvas.draw_idle()
 
     # ───────────────── Log Viewer (Modern Console) ───────────────── #
@@ -267,17 +567,65 @@ class Dashboard(ttk.Frame):
                 font=("Consolas", 10, "bold")
             )
 
+    def _insert_logs(self, entries):
+        # Build a single Tk insert call for the whole batch
+        args = []
+        inserted = 0
+        for line, level in entries:
+            if self.should_display(level):
+                args.extend((f"[{level}] ", level, f"{line}\n", ()))
+                inserted += 1
+        if args:
+            self.log_area.insert(END, *args)
+        return inserted
+
+    def _trim_logs(self):
+        excess = self.view_lines - self.max_view_lines
+        if excess > 0:
+            self.log_area.delete("1.0", f"{excess + 1}.0")
+            self.view_lines -= excess
+
+    def append_logs(self, entries):
+        if not entries:
+            return
+        self.log_area.config(state=NORMAL)
+        self.view_lines += self._insert_logs(entries)
+        self._trim_logs()
+        self.log_area.see(END)
+        self.log_area.config(state=DISABLED)
+
     def refresh_logs(self, logs):
-        self.all_logs = logs
+        # Full rebuild, only needed when the severity filters change
+        self.log_store = logs
         self.log_area.config(state=NORMAL)
         self.log_area.delete("1.0", END)
-        for line, level in logs:
-            if self.should_display(level):
-                self.log_area.insert(END, f"[{level}] ", level)
-                self.log_area.insert(END, f"{line}\n")
+        self.view_lines = 0
+
+        # Only the newest lines that fit under the cap are rendered
+        tail = logs.tail(self.max_view_lines, self.visible_levels)
+
+        self.view_lines = self._insert_logs(tail)
         self.log_area.see(END)
         self.log_area.config(state=DISABLED) # Keep logs read-only
 
+    def render_templates(self, templates):
+        # Collapsed view: one row per template, rebuilt as a whole
+        args = []
+        for template in templates:
+            seen = time.strftime("%H:%M:%S", time.localtime(template.last_seen))
+            args.extend((
+                f"×{template.count:<7}", (),
+                f"[{template.level}] ", template.level,
+                f"{template.text}   (last {seen})\n", (),
+            ))
+        self.log_area.config(state=NORMAL)
+        self.log_area.delete("1.0", END)
+        if args:
+            self.log_area.insert(END, *args)
+        self.view_lines = len(templates)
+        self.log_area.see(END)
+        self.log_area.config(state=DISABLED)
+
     # ───────────────── Status ───────────────── #
 
     def _init_status(self):
@@ -292,12 +640,62 @@ class Dashboard(ttk.Frame):
         )
         self.status.pack(side=LEFT, padx=10, pady=2)
 
+        self.ingest_status = ttk.Label(
+            self.status_frame,
+            text="Queue: 0 | Batch: 0 | Dropped: 0",
+            bootstyle="inverse-secondary",
+            font=("Helvetica", 9)
+        )
+        self.ingest_status.pack(side=RIGHT, padx=10, pady=2)
+
+        # Pipeline self-profiling; instrumentation only runs while this is on
+        self.metrics_enabled = ttk.BooleanVar(value=metrics.enabled)
+        ttk.Checkbutton(
+            self.status_frame,
+            text="Metrics",
+            variable=self.metrics_enabled,
+            bootstyle="round-toggle",
+            command=self._toggle_metrics
+        ).pack(side=RIGHT, padx=5, pady=2)
+
+        self.metrics_status = ttk.Label(
+            self.status_frame,
+            text="",
+            bootstyle="inverse-secondary",
+            font=("Helvetica", 9)
+        )
+        self.metrics_status.pack(side=RIGHT, padx=10, pady=2)
+
     def _set_status(self, text, style):
         self.status.config(text=f"● {text}", bootstyle=f"inverse-{style}")
 
+    def _toggle_metrics(self):
+        metrics.enabled = self.metrics_enabled.get()
+        if metrics.enabled:
+            metrics.reset()
+            self.metrics_status.config(text="collecting...")
+        else:
+            self.metrics_status.config(text="")
+
+    def update_metrics(self, text):
+        self.metrics_status.config(text=text)
+
+    def update_ingest_stats(self, depth, batch_size, dropped=0, spilled=None, on_disk=0):
+        # ``spilled`` is None unless the spill overflow policy is in use
+        text = f"Queue: {depth} | Batch: {batch_size} | Dropped: {dropped}"
+        if spilled is not None:
+            text += f" | Spilled: {spilled} ({on_disk} on disk)"
+        self.ingest_status.config(
+            text=text,
+            bootstyle="inverse-danger" if dropped else "inverse-secondary"
+        )
+
     def show_alert(self, message):
         self._set_status(message, "danger")
 
+    def show_info(self, message):
+        self._set_status(message, "info")
+
     def reset_status(self):
         self.paused = False
         self.pause_btn.config(text="Pause Stream", bootstyle="warning-outline")
@@ -5,9 +5,10 @@ import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 
 class FileSelector(ttk.Frame):
-    def __init__(self, master, on_file_selected):
+    def __init__(self, master, on_file_selected, on_import=None):
         super().__init__(master)
         self.on_file_selected = on_file_selected
+        self.on_import = on_import
         self.pack(fill=X, padx=10, pady=5)
 
         self.label = ttk.Label(self, text="No file selected", bootstyle="secondary")
@@ -21,12 +22,43 @@ class FileSelector(ttk.Frame):
         )
         self.button.pack(side=RIGHT)
 
+        if on_import:
+            self.import_button = ttk.Button(
+                self,
+                text="Import Archive",
+                bootstyle="secondary-outline",
+                command=self.open_import_dialog
+            )
+            self.import_button.pack(side=RIGHT, padx=5)
+
+            # Import app.log.N(.gz) siblings too, oldest first
+            self.include_rotated = ttk.BooleanVar(value=True)
+            ttk.Checkbutton(
+                self,
+                text="Include rotated",
+                variable=self.include_rotated,
+                bootstyle="round-toggle"
+            ).pack(side=RIGHT, padx=5)
+
     def open_file_dialog(self):
         file_paths = filedialog.askopenfilenames(
             title="Select log files",
-            filetypes=[("Log files", "*.log"), ("All files", "*.*")]
+            filetypes=[("Log files", "*.log *.gz *.bz2 *.xz"), ("All files", "*.*")]
         )
 
         if file_paths:
             self.label.config(text=f"{len(file_paths)} files selected")
             self.on_file_selected(file_paths)
+
+    def open_import_dialog(self):
+        file_paths = filedialog.askopenfilenames(
+            title="Select archived log files to import",
+            filetypes=[
+                ("Log files", "*.log *.log.* *.gz *.bz2 *.xz"),
+                ("All files", "*.*")
+            ]
+        )
+
+        if file_paths:
+            self.label.config(text=f"Importing {len(file_paths)} files")
+            self.on_import(file_paths, self.include_rotated.get())
@@ -0,0 +1,283 @@
+# app/headless.py
+# Headless runner: tails files through the same core as the dashboard and
+# writes structured output instead of drawing it.
+#
+#   python app/headless.py /var/log/app.log /var/log/db.log -o out.ndjson
+import argparse
+import json
+import re
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+
+from core.async_ingest import AsyncIngest, parse_listen
+from core.bulk import bulk_import
+from core.detector import Detector
+from core.filters import LogFilter
+from core.formats import FileFormats, format_names
+from core.ingest import OVERFLOW_POLICIES, IngestQueue
+from core.metrics import metrics
+from core.pipeline import Pipeline
+from core.templates import TemplateMiner
+from core.timeline import ReorderBuffer, merge_parsed
+from storage.checkpoints import CheckpointStore
+from storage.database import AlertDatabase, DB_PATH
+from storage.history import LogHistory, HISTORY_DB_PATH
+from storage.spill import SpillQueue
+from utils.constants import (
+    HISTORY_LINES,
+    MAX_BATCH_SIZE,
+    METRICS_DUMP_INTERVAL,
+    OVERFLOW_POLICY,
+    REORDER_WINDOW,
+)
+
+TICK_SECONDS = 0.05
+
+
+def _now():
+    return datetime.now().isoformat(timespec="milliseconds")
+
+
+def format_batch(accepted, alerts, store, fmt, alerts_only):
+    out = []
+    if fmt == "ndjson":
+        dumps = json.dumps
+        if not alerts_only:
+            stamp = _now()
+            visible = store.visible
+            for record, filepath, index in accepted:
+                if not visible[index]:
+                    continue
+                out.append(dumps({
+                    "time": stamp,
+                    "file": filepath,
+                    "level": record.level,
+                    "timestamp": record.timestamp,
+                    "message": record.message,
+                }))
+        for alert in alerts:
+            out.append(dumps({"time": _now(), "alert": True, **alert}))
+    else:
+        if not alerts_only:
+            visible = store.visible
+            for _, filepath, index in accepted:
+                if not visible[index]:
+                    continue
+                out.append(f"{store.filenames[store.files[index]]} | {store.lines[index]}")
+        for alert in alerts:
+            out.append(f"ALERT [{alert['level']}] {alert['message']}")
+    if out:
+        out.append("")
+    return "\n".join(out)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="logsentinel-headless",
+        description="Tail log files without the GUI: parse, detect, persist alerts and emit structured output."
+    )
+    parser.add_argument("files", nargs="*", help="log files to watch")
+    parser.add_argument("--listen", action="append", default=[], metavar="URL",
+                        help="receive syslog-style lines on udp://HOST:PORT, tcp://HOST:PORT, "
+                             "unix:///PATH or unixgram:///PATH (repeatable)")
+    parser.add_argument("-o", "--output", help="write output here instead of stdout")
+    parser.add_argument("--format", choices=("ndjson", "text"), default="ndjson")
+    parser.add_argument("--alerts-only", action="store_true", help="emit alerts but not log lines")
+    parser.add_argument("--include", action="append", default=[], metavar="REGEX",
+                        help="only emit lines matching REGEX (repeatable; any may match)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="REGEX",
+                        help="drop lines matching REGEX (repeatable)")
+    parser.add_argument("--grep", action="append", default=[], metavar="TEXT",
+                        help="only emit lines containing TEXT (repeatable; all must match)")
+    parser.add_argument("--log-format", choices=format_names(), default=None,
+                        help="parse every file with this format instead of detecting it from the first lines")
+    parser.add_argument("--from-start", action="store_true", help="read files from the beginning")
+    parser.add_argument("--no-follow", action="store_true", help="exit once the files have been read")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue each file from the position saved in --db by the last run; "
+                             "with --from-start, only files without a saved position are read from the top")
+    parser.add_argument("--import", dest="bulk", action="store_true",
+                        help="bulk-import the files with a process pool, then exit")
+    parser.add_argument("--merge", action="store_true",
+                        help="emit lines from all files in timestamp order; with --from-start --no-follow "
+                             "the files are merged as streams, otherwise live lines are reordered")
+    parser.add_argument("--reorder-window", type=float, default=REORDER_WINDOW, metavar="SECONDS",
+                        help="with --merge, how long a live line may wait for earlier lines from other files")
+    parser.add_argument("--rotated", action="store_true",
+                        help="with --import or --merge --from-start --no-follow, read each file's whole "
+                             "rotation set (app.log.2.gz, app.log.1, app.log)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes for --import and for merging a finished backlog")
+    parser.add_argument("--overflow", choices=OVERFLOW_POLICIES, default=OVERFLOW_POLICY,
+                        help="when output falls behind: block the readers, drop lines without a "
+                             "warning/error, keep a sample, or spill to a queue on disk")
+    parser.add_argument("--history-lines", type=int, default=HISTORY_LINES,
+                        help="lines replayed from the end of each file on attach")
+    parser.add_argument("--db", default=str(DB_PATH), help="alert database path")
+    parser.add_argument("--no-db", action="store_true", help="do not persist alerts")
+    parser.add_argument("--history", nargs="?", const=str(HISTORY_DB_PATH), default=None,
+                        help="also keep a searchable history database (optional path)")
+    parser.add_argument("--templates", type=int, nargs="?", const=20, default=0, metavar="N",
+                        help="mine message templates and print the N most frequent on exit")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="collect pipeline metrics and append them to PATH periodically")
+    return parser
+
+
+def run(args):
+    out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+
+    database = None if args.no_db else AlertDatabase(args.db)
+    history = LogHistory(args.history) if args.history else None
+    templates = TemplateMiner() if args.templates else None
+    pipeline = Pipeline(detector=Detector(), database=database, history=history, templates=templates,
+                        formats=FileFormats(args.log_format))
+    # Filtered-out lines are still counted and fed to the detector
+    pipeline.set_filter(LogFilter(args.include, args.exclude, args.grep))
+    spill = SpillQueue() if args.overflow == "spill" else None
+    ingest = IngestQueue(policy=args.overflow, spill=spill)
+    # A finished backlog can be merged up front; anything live is reordered
+    # (a resumed run goes through the tailer, which knows the saved positions)
+    merge_backlog = (args.merge and args.from_start and args.no_follow and not args.listen
+                     and not args.bulk and not args.resume)
+    if args.merge and not merge_backlog:
+        pipeline.reorder = ReorderBuffer(args.reorder_window)
+    checkpoints = CheckpointStore(args.db) if args.resume else None
+
+    # Files and receivers share one event loop thread
+    source = AsyncIngest(
+        ingest,
+        args.files,
+        listeners=args.listen,
+        history_lines=args.history_lines,
+        from_start=args.from_start,
+        follow=not args.no_follow,
+        checkpoints=checkpoints
+    )
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+
+    if args.metrics:
+        metrics.enabled = True
+        metrics.reset()
+    last_dump = time.time()
+
+    started = time.perf_counter()
+    alert_count = 0
+
+    def report_errors():
+        for path, error in source.pop_errors():
+            print(f"logsentinel-headless: {path or 'ingest stopped'}: {error}", file=sys.stderr)
+
+    def emit(accepted, alerts):
+        nonlocal alert_count
+        alert_count += len(alerts)
+        text = format_batch(accepted, alerts, pipeline.store, args.format, args.alerts_only)
+        if text:
+            out.write(text)
+
+    try:
+        if args.bulk:
+            for path in args.files:
+                bulk_import(path, pipeline, workers=args.workers, on_batch=emit, rotated=args.rotated,
+                            log_format=args.log_format)
+            out.flush()
+        elif merge_backlog:
+            # A few parsed chunks per file; never the whole backlog in memory
+            chunk = []
+            for item in merge_parsed(args.files, rotated=args.rotated, workers=args.workers,
+                                     log_format=args.log_format):
+                chunk.append(item)
+                if len(chunk) >= MAX_BATCH_SIZE:
+                    emit(*pipeline.process_records(chunk))
+                    chunk = []
+                    if stopping.is_set():
+                        break
+            emit(*pipeline.process_records(chunk))
+            out.flush()
+        else:
+            source.start()
+            while not stopping.is_set():
+                batch = ingest.drain(MAX_BATCH_SIZE)
+                if args.metrics:
+                    metrics.gauge("queue_depth", ingest.depth)
+                    if time.time() - last_dump >= METRICS_DUMP_INTERVAL:
+                        metrics.dump(args.metrics)
+                        last_dump = time.time()
+                if batch or pipeline.pending:
+                    emit(*pipeline.process(batch))
+                    out.flush()
+                report_errors()
+                if batch:
+                    continue
+                if not source.is_alive():
+                    break  # --no-follow and everything has been processed
+                stopping.wait(TICK_SECONDS)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.stop()
+        source.join()  # final checkpoint save
+        # Everything read is checkpointed, so it must be processed before exit
+        batch = ingest.drain(MAX_BATCH_SIZE)
+        while batch:
+            emit(*pipeline.process(batch))
+            batch = ingest.drain(MAX_BATCH_SIZE)
+        emit(*pipeline.flush())  # lines still held for reordering
+        report_errors()
+        elapsed = time.perf_counter() - started
+        pipeline.close()
+        if checkpoints:
+            checkpoints.close()
+        if spill:
+            spill.close()
+        if args.metrics:
+            metrics.dump(args.metrics)
+        if out is not sys.stdout:
+            out.close()
+
+    if templates:
+        print(f"{len(templates)} templates; most frequent:", file=sys.stderr)
+        for template in templates.most_common(args.templates):
+            print(f"  ×{template.count:<8} [{template.level}] {template.text}", file=sys.stderr)
+
+    seen = pipeline.lines_seen
+    rate = seen / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Processed {seen} lines ({seen - pipeline.unparsed} parsed, {pipeline.unparsed} unparsed, "
+        f"{alert_count} alerts) in {elapsed:.2f}s: {rate:,.0f} lines/s",
+        file=sys.stderr
+    )
+    dropped = ingest.dropped + source.dropped
+    if dropped or ingest.spilled:
+        print(f"Overflow: {dropped} lines dropped, {ingest.spilled} spilled to disk", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.files and (args.bulk or not args.listen):
+        parser.error("give at least one file" + ("" if args.bulk else " or --listen address"))
+    try:
+        LogFilter(args.include, args.exclude, args.grep)
+    except re.error as e:
+        parser.error(f"invalid regex: {e}")
+    try:
+        for spec in args.listen:
+            parse_listen(spec)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        return run(args)
+    except (OSError, ValueError) as e:  # ValueError: a bad LOG_FORMATS definition
+        print(f"logsentinel-headless: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,44 @@
 # app/main.py
+import queue
+import sys
 import threading
 import ttkbootstrap as ttk
 import time
 from gui.dashboard import Dashboard
 from gui.file_selector import FileSelector
-from core.monitor import LogMonitor
-from core.parser import parse_log_line
+from core.async_ingest import AsyncIngest
+from core.bulk import iter_parsed_chunks
 from core.detector import Detector
+from core.ingest import IngestQueue
+from core.metrics import metrics
+from core.pipeline import Pipeline
+from core.rotation import expand_rotation_sets
+from core.rollups import Rollups
+from core.store import LogStore
+from core.templates import TemplateMiner
+from core.timeline import ReorderBuffer, merge_parsed
+from storage.checkpoints import CheckpointStore
 from storage.database import AlertDatabase
-from utils.constants import LOG_LEVELS
+from storage.history import LogHistory
+from storage.spill import SpillQueue
+from utils.constants import (
+    UI_TICK_MS,
+    MAX_BATCH_SIZE,
+    CHART_MAX_FPS,
+    HISTORY_ENABLED,
+    BULK_UI_SLICE,
+    BULK_TICK_BUDGET_MS,
+    METRICS_DUMP_PATH,
+    METRICS_DUMP_INTERVAL,
+    CHECKPOINTS_ENABLED,
+    CLOSE_DRAIN_SECONDS,
+    RECEIVERS,
+    MERGE_TIMELINE,
+    OVERFLOW_POLICY,
+    TEMPLATES_ENABLED,
+    TEMPLATE_REFRESH_MS,
+    TREND_REFRESH_MS,
+)
 
 
 class LogSentinelApp:
@@ -16,22 +46,46 @@ class LogSentinelApp:
         self.root = root
         self.monitors = []
         self.thread = None
-        self.last_chart_update = time.time()
-        self.chart_interval = 1.0  # seconds
+        self.last_chart_update = 0.0
+        self.chart_interval = 1.0 / CHART_MAX_FPS  # seconds
+        self.chart_pending = None
         self.detector = Detector()
         self.database = AlertDatabase()
-        self.all_logs = []
-        self.level_counts = {level: 0 for level in LOG_LEVELS}
+        self.history = LogHistory() if HISTORY_ENABLED else None
+        self.checkpoints = CheckpointStore() if CHECKPOINTS_ENABLED else None
+        # Bounded hand-off; OVERFLOW_POLICY decides what happens when it fills
+        self.spill = SpillQueue() if OVERFLOW_POLICY == "spill" else None
+        self.ingest = IngestQueue(spill=self.spill)
+        self.store = LogStore()
+        self.templates = TemplateMiner() if TEMPLATES_ENABLED else None
+        self.templates_pending = None
+        self.rollups = Rollups()
+        self.pipeline = Pipeline(self.store, self.detector, self.database, self.history,
+                                 self.templates, self.rollups)
 
         self.dashboard = Dashboard(
             root,
             on_pause=self.pause_monitoring,
             on_resume=self.resume_monitoring,
-            on_filter_change=self.refresh_filtered_logs
+            on_filter_change=self.refresh_filtered_logs,
+            on_trend_change=self.draw_trend
         )
+        self.dashboard.log_store = self.store
+        if self.templates is None:
+            self.dashboard.collapse_toggle.configure(state="disabled")
+
+        self.file_selector = FileSelector(root, self.start_monitoring, on_import=self.import_files)
+        # (filepath, rows, line_count) slices from imports, None when one
+        # ends; import threads block while it is full
+        self.bulk_pending = queue.Queue(maxsize=50)
+
+        self.root.after(UI_TICK_MS, self.drain_ingest)
+        self.root.after(TREND_REFRESH_MS, self.tick_trend)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.last_metrics_update = 0.0
+        if METRICS_DUMP_PATH:
+            self.root.after(int(METRICS_DUMP_INTERVAL * 1000), self.dump_metrics)
 
-        self.file_selector = FileSelector(root, self.start_monitoring)
-        
     # def start_monitoring(self, filepaths):
     #     if self.monitor:
     #         self.monitor.stop()
@@ -54,76 +108,265 @@ class LogSentinelApp:
     #     self.thread.start()
       
     def start_monitoring(self, filepaths):
-        # Stop existing monitors
+        # Stop existing monitors; receivers must release their ports first
         for monitor in self.monitors:
             monitor.stop()
+        for monitor in self.monitors:
+            monitor.join(2)
 
         self.monitors.clear()
-        self.all_logs.clear()
-
-        self.detector.reset()
-        self.level_counts = {level: 0 for level in LOG_LEVELS}
+        # The old session's files are checkpointed past what it read, so
+        # those lines go through detection before the reset, as on close
+        left = self.process_remaining()
+        self.pipeline.flush()
+        self.ingest.clear()
+        self.pipeline.reset()
+        # Several sources: hold lines briefly so the view is in timestamp order
+        sources = len(filepaths) + len(RECEIVERS)
+        self.pipeline.reorder = ReorderBuffer() if MERGE_TIMELINE and sources > 1 else None
+        self.dashboard.refresh_logs(self.store)
         self.dashboard.reset_status()
+        if left:
+            self.dashboard.show_alert(f"{left} queued lines from the previous files were left unprocessed")
 
-        for path in filepaths:
-            monitor = LogMonitor(
-                filepath=path,
-                callback=lambda line, p=path: self.schedule_log_update(line, p)
-            )
-            self.monitors.append(monitor)
+        # One event loop tails every selected file and runs the configured
+        # network receivers. Files seen in an earlier session resume from
+        # their checkpoint and catch up on what was written in between.
+        source = AsyncIngest(
+            self.ingest,
+            filepaths,
+            listeners=RECEIVERS,
+            checkpoints=self.checkpoints
+        )
+        try:
+            source.start()
+        except OSError as e:
+            self.dashboard.show_alert(f"Could not start receivers: {e}")
+            return
+        self.monitors.append(source)
+        self.check_sources()
 
-            thread = threading.Thread(
-                target=monitor.start,
-                daemon=True
-            )
-            thread.start()
-    
-    def schedule_log_update(self, line, filepath):
-        self.root.after(0, self.on_new_line, line, filepath)
+    def check_sources(self):
+        # Files that can't be read are skipped while the others keep going;
+        # if the ingest thread itself fails, monitoring has stopped
+        for monitor in self.monitors:
+            for path, error in monitor.pop_errors():
+                if path is None:
+                    self.dashboard.show_alert(f"Monitoring stopped: {error}")
+                else:
+                    self.dashboard.show_alert(f"Skipped {path}: {error}")
+
+    def import_files(self, filepaths, rotated=False):
+        # Parsing runs in a process pool off the UI thread; merged results are
+        # handed over in slices so each tick stays short. A rotation set is
+        # imported oldest first under the live file's name.
+        if rotated:
+            members = expand_rotation_sets(filepaths)
+        else:
+            members = [(path, path) for path in filepaths]
+
+        paths = list(dict.fromkeys(path for _, path in members))
+        if MERGE_TIMELINE and len(paths) > 1:
+            # Several files: every file is parsed in the same pool and the
+            # per-file streams are heap-merged in timestamp order
+            def read():
+                chunk = []
+                for item in merge_parsed(paths, rotated=rotated):
+                    chunk.append(item)
+                    if len(chunk) >= BULK_UI_SLICE:
+                        self.bulk_pending.put((None, chunk, len(chunk)))
+                        chunk = []
+                if chunk:
+                    self.bulk_pending.put((None, chunk, len(chunk)))
+
+            status = f"Importing {len(paths)} files in time order..."
+        else:
+            def read():
+                for member, path in members:
+                    for rows, line_count in iter_parsed_chunks(member):
+                        for offset in range(0, max(len(rows), 1), BULK_UI_SLICE):
+                            piece = rows[offset:offset + BULK_UI_SLICE]
+                            # Attribute the chunk's unparsed lines to its last slice
+                            last = offset + BULK_UI_SLICE >= len(rows)
+                            count = line_count - offset if last else len(piece)
+                            self.bulk_pending.put((path, piece, count))
+
+            status = f"Importing {len(members)} files..."
 
+        threading.Thread(target=self._run_import, args=(read,), daemon=True).start()
+        self.dashboard.show_info(status)
 
-    def on_new_line(self, line, filepath):
-        parsed = parse_log_line(line)
-        if not parsed:
+    def _run_import(self, read):
+        # Import thread. Slices are queued with path None marking merged
+        # (line, filepath, record) rows; a failure is reported on the UI
+        # thread, the end is queued behind the last slice
+        try:
+            read()
+        except Exception as e:
+            self.root.after(0, lambda error=e: self.dashboard.show_alert(f"Import failed: {error}"))
             return
+        self.bulk_pending.put(None)
+
+    def drain_ingest(self):
+        if not self.bulk_pending.empty():
+            # As many imported slices as fit in the tick's budget, shown once
+            accepted, alerts = [], []
+            deadline = time.perf_counter() + BULK_TICK_BUDGET_MS / 1000
+            while True:
+                try:
+                    item = self.bulk_pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.dashboard.show_info("Import finished")
+                    continue
+                path, rows, line_count = item
+                if path is None:
+                    result = self.pipeline.process_records(rows)
+                else:
+                    result = self.pipeline.process_parsed(path, rows, line_count)
+                accepted.extend(result[0])
+                alerts.extend(result[1])
+                if time.perf_counter() >= deadline:
+                    break
+            self.show_batch(accepted, alerts)
+
+        batch = self.ingest.drain(MAX_BATCH_SIZE)
+        if batch or self.pipeline.pending:
+            self.process_batch(batch)
+        self.check_sources()
+        self.dashboard.update_ingest_stats(
+            self.ingest.depth,
+            len(batch),
+            # Overflow drops plus datagrams the receivers had no room for
+            self.ingest.dropped + sum(monitor.dropped for monitor in self.monitors),
+            self.ingest.spilled if self.spill else None,
+            self.ingest.spill_depth
+        )
+
+        if metrics.enabled:
+            metrics.gauge("queue_depth", self.ingest.depth)
+            metrics.gauge("batch_size", len(batch))
+            now = time.time()
+            if now - self.last_metrics_update >= 1.0:
+                self.last_metrics_update = now
+                self.dashboard.update_metrics(metrics.status_line())
 
-        level = parsed["level"]
+        self.root.after(UI_TICK_MS, self.drain_ingest)
 
-        # store log
-        filename = filepath.split("/")[-1]
-        display_line = f"{filename} | {line}"
-        self.all_logs.append((display_line, level))
+    def dump_metrics(self):
+        if metrics.enabled:
+            try:
+                metrics.dump(METRICS_DUMP_PATH)
+            except OSError as e:
+                self.dashboard.show_alert(f"Metrics dump failed: {e}")
+        self.root.after(int(METRICS_DUMP_INTERVAL * 1000), self.dump_metrics)
 
-        # update counts
-        if level in self.level_counts:
-            self.level_counts[level] += 1
-            self.dashboard.update_count(level, self.level_counts[level])
+    def process_batch(self, batch):
+        self.show_batch(*self.pipeline.process(batch))
 
-        # 🚨 PROCESS ALERT LOGIC
-        alert = self.detector.process(level)
-        if alert:
+    def show_batch(self, accepted, alerts):
+        if not accepted:
+            return
+        if metrics.enabled:
+            start = time.perf_counter()
+
+        for level, count in self.pipeline.level_counts.items():
+            self.dashboard.update_count(level, count)
+
+        if alerts:
+            # One popup per batch; the latest alert carries the highest count
+            alert = alerts[-1]
             self.dashboard.show_alert(alert["message"])
             self.dashboard.show_popup_alert(
                 title=f"{alert['level']} Alert",
                 message=f"{alert['message']}\nCount: {alert['count']}"
             )
 
-        # refresh UI
-        self.refresh_filtered_logs()
-    
-    
+        if self.collapsed:
+            # One row per template, redrawn on a timer instead of per line
+            self.update_templates()
+        else:
+            # refresh UI: append only the new lines that can still be shown;
+            # text-filter results were cached on the store at ingest
+            visible = self.store.visible
+            recent = [index for _, _, index in accepted if visible[index]][-self.dashboard.max_view_lines:]
+            self.dashboard.append_logs([self.store.entry(index) for index in recent])
+        self.update_chart()
+
+        if metrics.enabled:
+            metrics.observe("render_frame", time.perf_counter() - start)
+
     def refresh_filtered_logs(self):
-        self.dashboard.refresh_logs(self.all_logs)
+        # Filters changed: re-flag retained lines only if the text filter
+        # changed, then rebuild the viewer from the retained logs
+        if self.dashboard.text_filter is not self.pipeline.filter:
+            shown = self.pipeline.set_filter(self.dashboard.text_filter)
+            if self.pipeline.filter:
+                self.dashboard.show_info(f"Filter matches {shown} of {len(self.store)} retained lines")
+        if self.collapsed:
+            self._draw_templates()
+        else:
+            self.dashboard.refresh_logs(self.store)
+        self.update_chart(force=True)
+        self.draw_trend()
 
-        filtered_counts = {lvl: 0 for lvl in LOG_LEVELS}
-        for _, level in self.all_logs:
-            if self.dashboard.should_display(level):
-                filtered_counts[level] += 1
+    @property
+    def collapsed(self):
+        return self.templates is not None and self.dashboard.collapsed.get()
 
-        self.dashboard.update_chart(filtered_counts)
+    def update_templates(self):
+        if self.templates_pending is None:
+            self.templates_pending = self.root.after(TEMPLATE_REFRESH_MS, self._draw_templates)
 
+    def _draw_templates(self):
+        if self.templates_pending is not None:
+            self.root.after_cancel(self.templates_pending)
+            self.templates_pending = None
+        if not self.collapsed:
+            return
+        rows = self.templates.recent(self.dashboard.max_view_lines, self.dashboard.visible_levels)
+        if self.pipeline.filter:
+            matches = self.pipeline.filter.matches
+            rows = [template for template in rows if matches(template.text)]
+        self.dashboard.render_templates(rows)
+
+    def update_chart(self, force=False):
+        # Coalesce redraws to at most CHART_MAX_FPS; a trailing update is
+        # scheduled so the chart always settles on the latest counts
+        elapsed = time.time() - self.last_chart_update
+        if not force and elapsed < self.chart_interval:
+            if self.chart_pending is None:
+                delay = int((self.chart_interval - elapsed) * 1000) + 1
+                self.chart_pending = self.root.after(delay, self._draw_chart)
+            return
+        self._draw_chart()
+
+    def _draw_chart(self):
+        if self.chart_pending is not None:
+            self.root.after_cancel(self.chart_pending)
+            self.chart_pending = None
+        self.last_chart_update = time.time()
+        # Counters are maintained by the store, so this is O(levels)
+        if metrics.enabled:
+            start = time.perf_counter()
+            self.dashboard.update_chart(self.store.counts(self.dashboard.visible_levels))
+            metrics.observe("render_chart", time.perf_counter() - start)
+        else:
+            self.dashboard.update_chart(self.store.counts(self.dashboard.visible_levels))
+
+    def tick_trend(self):
+        # The time axis moves even when nothing arrives, so this runs on a timer
+        self.draw_trend()
+        self.root.after(TREND_REFRESH_MS, self.tick_trend)
+
+    def draw_trend(self):
+        # Reads at most TREND_MAX_POINTS buckets per level from the rollups
+        now = time.time()
+        span = self.dashboard.TREND_RANGES[self.dashboard.trend_range.get()]
+        bucket, starts, series = self.rollups.trend(span, self.dashboard.visible_levels, now=now)
+        self.dashboard.update_trend(bucket, starts, series, now)
 
-        
     def pause_monitoring(self):
         for monitor in self.monitors:
             monitor.pause()
@@ -132,6 +375,35 @@ class LogSentinelApp:
         for monitor in self.monitors:
             monitor.resume()
 
+    def process_remaining(self):
+        # Lines already read (and checkpointed) still go through detection,
+        # including any spilled to disk: nothing replays them next session.
+        # A large spill could take long, so this stops after
+        # CLOSE_DRAIN_SECONDS and returns how many lines were left
+        deadline = time.perf_counter() + CLOSE_DRAIN_SECONDS
+        batch = self.ingest.drain(MAX_BATCH_SIZE)
+        while batch:
+            self.pipeline.process(batch)
+            if time.perf_counter() >= deadline:
+                break
+            batch = self.ingest.drain(MAX_BATCH_SIZE)
+        return self.ingest.depth + self.ingest.spill_depth
+
+    def on_close(self):
+        for monitor in self.monitors:
+            monitor.stop()
+        for monitor in self.monitors:
+            monitor.join(2)  # lets it save its final positions
+        left = self.process_remaining()
+        if left:
+            print(f"LogSentinel: closed with {left} queued lines left unprocessed", file=sys.stderr)
+        self.pipeline.close()
+        if self.checkpoints:
+            self.checkpoints.close()
+        if self.spill:
+            self.spill.close()
+        self.root.destroy()
+
 
 def main():
     root = ttk.Window(
@@ -0,0 +1,61 @@
+# app/storage/checkpoints.py
+import threading
+import time
+
+from storage.database import DB_PATH, connect
+
+
+class CheckpointStore:
+    """Per-file read positions in the local database.
+
+    A checkpoint is (path, device, inode, offset, line_hash): the byte
+    offset just past the last line handed to the pipeline and a hash of
+    that line, so a restarted monitor can tell whether the file it finds
+    is still the one it was reading. Monitor threads save through a lock.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.conn = connect(db_path)
+        self.lock = threading.Lock()
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                path TEXT PRIMARY KEY,
+                device INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                line_hash TEXT NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def load(self, path):
+        # (device, inode, offset, line_hash) or None
+        with self.lock:
+            return self.conn.execute(
+                "SELECT device, inode, offset, line_hash FROM checkpoints WHERE path = ?", (path,)
+            ).fetchone()
+
+    def save_many(self, rows):
+        # rows: (path, device, inode, offset, line_hash)
+        now = time.time()
+        with self.lock:
+            self.conn.executemany("""
+                INSERT INTO checkpoints (path, device, inode, offset, line_hash, updated)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    device = excluded.device, inode = excluded.inode,
+                    offset = excluded.offset, line_hash = excluded.line_hash,
+                    updated = excluded.updated
+            """, [(*row, now) for row in rows])
+            self.conn.commit()
+
+    def forget(self, path):
+        with self.lock:
+            self.conn.execute("DELETE FROM checkpoints WHERE path = ?", (path,))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
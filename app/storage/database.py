@@ -1,16 +1,156 @@
 # app/storage/database.py
+import queue
 import sqlite3
+import sys
+import threading
+import time
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from utils.constants import ALERT_RETENTION_DAYS, DB_BATCH_SIZE, DB_FLUSH_INTERVAL
 
 DB_PATH = Path("logsentinel.db")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_STOP = object()
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")     # readers don't block the writer
+    conn.execute("PRAGMA synchronous=NORMAL")   # safe with WAL, far fewer fsyncs
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def format_timestamp(value):
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    return value
+
+
+class BatchWriter:
+    """Background thread that owns a write connection and commits queued
+    rows in batches. ``write(conn, batch)`` does the actual inserts;
+    ``maintain(conn)`` runs at startup and then hourly. A batch that fails
+    to write is rolled back, counted in ``failed`` and reported on stderr;
+    the thread keeps going with the next one."""
+
+    def __init__(self, db_path, write, maintain=None, batch_size=DB_BATCH_SIZE):
+        self.db_path = db_path
+        self.write = write
+        self.maintain = maintain
+        self.batch_size = batch_size
+        self.pending = queue.Queue()
+        self.written = 0
+        self.failed = 0
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def put(self, row):
+        self.pending.put(row)
+
+    def put_many(self, rows):
+        for row in rows:
+            self.pending.put(row)
+
+    def _report(self, conn, what, error):
+        self.error = error
+        print(f"logsentinel: {what} failed for {self.db_path}: {error}", file=sys.stderr)
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            pass
+
+    def _run_maintenance(self, conn):
+        try:
+            self.maintain(conn)
+        except Exception as e:
+            self._report(conn, "maintenance", e)
+
+    def _run(self):
+        conn = connect(self.db_path)
+        if self.maintain:
+            self._run_maintenance(conn)
+        last_maintenance = datetime.now()
+        running = True
+
+        while running:
+            try:
+                item = self.pending.get(timeout=DB_FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+
+            # Gather whatever else is already waiting into the same batch
+            batch, flushes = [], []
+            while True:
+                if item is _STOP:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    flushes.append(item)  # signalled once the batch is written
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.pending.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self.write(conn, batch)
+                    conn.commit()
+                    self.written += len(batch)
+                except Exception as e:
+                    self.failed += len(batch)
+                    self._report(conn, f"writing {len(batch)} rows", e)
+
+            if self.maintain and datetime.now() - last_maintenance > timedelta(hours=1):
+                self._run_maintenance(conn)
+                last_maintenance = datetime.now()
+
+            for event in flushes:
+                event.set()
+
+        conn.close()
+
+    def flush(self, timeout=None):
+        # Block until everything queued so far is on disk; False on timeout
+        # or when the writer thread is gone
+        event = threading.Event()
+        self.pending.put(event)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.thread.is_alive():
+            wait = 0.5 if deadline is None else min(0.5, deadline - time.monotonic())
+            if wait <= 0:
+                break
+            if event.wait(wait):
+                return True
+        return event.is_set()
+
+    def close(self):
+        self.pending.put(_STOP)
+        self.thread.join()
 
 
 class AlertDatabase:
-    def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    """Alert history in SQLite.
+
+    ``save_alert`` only enqueues; a BatchWriter thread inserts with
+    ``executemany`` so the UI thread never waits on disk.
+    """
+
+    def __init__(self, db_path=DB_PATH, retention_days=ALERT_RETENTION_DAYS):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self.conn = connect(db_path)  # reads (UI thread)
         self._create_table()
 
+        self.writer = BatchWriter(db_path, self._write_batch, self._apply_retention)
+
     def _create_table(self):
         cursor = self.conn.cursor()
         cursor.execute("""
@@ -22,30 +162,58 @@ class AlertDatabase:
                 count INTEGER NOT NULL
             )
         """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts (timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_alerts_level_timestamp ON alerts (level, timestamp)")
         self.conn.commit()
 
     def save_alert(self, level: str, message: str, count: int):
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO alerts (timestamp, level, message, count)
-            VALUES (?, ?, ?, ?)
-        """, (
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        self.writer.put((
+            datetime.now().strftime(TIMESTAMP_FORMAT),
             level,
             message,
             count
         ))
-        self.conn.commit()
 
-    def get_alerts(self, limit=100):
+    def _write_batch(self, conn, batch):
+        conn.executemany("""
+            INSERT INTO alerts (timestamp, level, message, count)
+            VALUES (?, ?, ?, ?)
+        """, batch)
+
+    def _apply_retention(self, conn):
+        if not self.retention_days:
+            return
+        cutoff = datetime.now() - timedelta(days=self.retention_days)
+        conn.execute("DELETE FROM alerts WHERE timestamp < ?", (format_timestamp(cutoff),))
+        conn.commit()
+
+    def flush(self, timeout=None):
+        return self.writer.flush(timeout)
+
+    def get_alerts(self, limit=100, level=None, since=None, until=None):
+        clauses, params = [], []
+        if level:
+            clauses.append("level = ?")
+            params.append(level)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(format_timestamp(since))
+        if until:
+            clauses.append("timestamp <= ?")
+            params.append(format_timestamp(until))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        # Both indexes end in the rowid, so this ordering needs no sort step
         cursor = self.conn.cursor()
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT timestamp, level, message, count
             FROM alerts
-            ORDER BY id DESC
+            {where}
+            ORDER BY timestamp DESC, id DESC
             LIMIT ?
-        """, (limit,))
+        """, (*params, limit))
         return cursor.fetchall()
 
     def close(self):
+        self.writer.close()
         self.conn.close()
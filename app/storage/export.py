@@ -0,0 +1,96 @@
+# app/storage/export.py
+import csv
+import gzip
+import json
+import os
+from datetime import datetime
+
+EXPORT_FORMATS = ("csv", "json", "ndjson")
+PROGRESS_EVERY = 5000  # rows scanned between progress callbacks / cancel checks
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def detect_format(file_path):
+    # "logs.ndjson.gz" -> ("ndjson", True)
+    name = file_path.lower()
+    compressed = name.endswith(".gz")
+    if compressed:
+        name = name[:-3]
+    extension = os.path.splitext(name)[1].lstrip(".")
+    if extension == "jsonl":
+        extension = "ndjson"
+    return (extension if extension in EXPORT_FORMATS else "csv"), compressed
+
+
+def _open(file_path, compressed):
+    if compressed:
+        return gzip.open(file_path, "wt", encoding="utf-8", newline="", compresslevel=6)
+    return open(file_path, "w", encoding="utf-8", newline="")
+
+
+def _records(rows):
+    for when, filename, level, line in rows:
+        yield {
+            "time": datetime.fromtimestamp(when).isoformat(timespec="milliseconds"),
+            "level": level,
+            "message": f"{filename} | {line}",
+        }
+
+
+def export_logs(store, file_path, fmt=None, compressed=None, levels=None,
+                since=None, until=None, progress=None, cancel=None, visible_only=False):
+    """Stream ``store`` to ``file_path`` row by row.
+
+    ``progress(scanned, total)`` is called every PROGRESS_EVERY stored rows
+    scanned, matching or not, and ``cancel`` (a ``threading.Event``) is
+    checked at the same points; a cancelled export
+    removes the partial file and raises ExportCancelled. Returns the number
+    of rows written.
+    """
+    detected_fmt, detected_compressed = detect_format(file_path)
+    fmt = fmt or detected_fmt
+    compressed = detected_compressed if compressed is None else compressed
+
+    total = len(store)
+    chunks = store.select_chunks(levels, since, until, visible_only, PROGRESS_EVERY)
+    written = 0
+
+    try:
+        with _open(file_path, compressed) as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(["Level", "Message"])
+                write = lambda record: writer.writerow([record["level"], record["message"]])
+            elif fmt == "json":
+                # Streamed array: one compact object per line
+                f.write("[")
+                dumps = json.dumps
+                write = lambda record: f.write(("\n" if written == 0 else ",\n") + dumps(record))
+            else:
+                dumps = json.dumps
+                write = lambda record: f.write(dumps(record) + "\n")
+
+            for scanned, rows in chunks:
+                for record in _records(rows):
+                    write(record)
+                    written += 1
+                if cancel is not None and cancel.is_set():
+                    raise ExportCancelled()
+                if progress:
+                    progress(scanned, total)
+
+            if fmt == "json":
+                f.write("\n]\n")
+    except BaseException:
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+        raise
+
+    if progress:
+        progress(total, total)
+    return written
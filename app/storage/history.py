@@ -0,0 +1,118 @@
+# app/storage/history.py
+import time
+from datetime import datetime
+from pathlib import Path
+
+from storage.database import BatchWriter, connect
+from utils.constants import HISTORY_BATCH_SIZE
+
+HISTORY_DB_PATH = Path("logsentinel_history.db")
+
+
+def _epoch(value):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
+
+
+def fts_query(keyword):
+    # Quote every term so user input is matched literally (implicit AND)
+    terms = keyword.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+class LogHistory:
+    """Optional on-disk history of parsed lines with an FTS5 index.
+
+    Lines are written in batches by a BatchWriter thread; ``search`` runs
+    on its own read connection.
+    """
+
+    def __init__(self, db_path=HISTORY_DB_PATH):
+        self.db_path = db_path
+        self.conn = connect(db_path)  # reads (UI thread)
+        self._create_tables()
+        self.writer = BatchWriter(db_path, self._write_batch, batch_size=HISTORY_BATCH_SIZE)
+
+    def _create_tables(self):
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS logs (
+                id INTEGER PRIMARY KEY,
+                time REAL NOT NULL,
+                level TEXT NOT NULL,
+                file TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                message TEXT NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_time ON logs (time)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_level_time ON logs (level, time)")
+        # External-content index: the text is stored once, in ``logs``
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts
+            USING fts5(message, content='logs', content_rowid='id')
+        """)
+        self.conn.commit()
+
+    def add(self, level, message, filepath, timestamp="", when=None):
+        self.writer.put((time.time() if when is None else when, level, filepath, timestamp, message))
+
+    def add_records(self, records, when=None):
+        # records: iterable of (LogRecord, filepath)
+        when = time.time() if when is None else when
+        self.writer.put_many(
+            (when, record.level, filepath, record.timestamp, record.message)
+            for record, filepath in records
+        )
+
+    def _write_batch(self, conn, batch):
+        first_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM logs").fetchone()[0]
+        conn.executemany("""
+            INSERT INTO logs (time, level, file, timestamp, message)
+            VALUES (?, ?, ?, ?, ?)
+        """, batch)
+        conn.execute("""
+            INSERT INTO logs_fts (rowid, message)
+            SELECT id, message FROM logs WHERE id > ?
+        """, (first_id,))
+
+    def flush(self, timeout=None):
+        return self.writer.flush(timeout)
+
+    def search(self, keyword=None, level=None, since=None, until=None, limit=200):
+        # Newest first: (time, level, file, timestamp, message)
+        clauses, params = [], []
+        if keyword:
+            source = "logs_fts JOIN logs ON logs.id = logs_fts.rowid"
+            clauses.append("logs_fts MATCH ?")
+            params.append(fts_query(keyword))
+            order = "logs_fts.rowid DESC"
+        else:
+            source = "logs"
+            # Matches the (level, time) / (time) indexes, which end in the rowid
+            order = "logs.time DESC, logs.id DESC"
+        if level:
+            clauses.append("logs.level = ?")
+            params.append(level)
+        if since is not None:
+            clauses.append("logs.time >= ?")
+            params.append(_epoch(since))
+        if until is not None:
+            clauses.append("logs.time <= ?")
+            params.append(_epoch(until))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            SELECT logs.time, logs.level, logs.file, logs.timestamp, logs.message
+            FROM {source}
+            {where}
+            ORDER BY {order}
+            LIMIT ?
+        """, (*params, limit))
+        return cursor.fetchall()
+
+    def close(self):
+        self.writer.close()
+        self.conn.close()
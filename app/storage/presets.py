@@ -0,0 +1,33 @@
+# app/storage/presets.py
+import json
+import os
+import re
+from pathlib import Path
+
+from core.filters import LogFilter
+
+PRESETS_PATH = Path("logsentinel_filters.json")
+
+
+def load_presets(path=PRESETS_PATH):
+    # name -> LogFilter; a missing or unreadable file means no presets
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    presets = {}
+    for name, spec in data.items():
+        try:
+            presets[name] = LogFilter.from_dict(spec)
+        except (re.error, AttributeError):
+            continue  # hand-edited entry that no longer compiles
+    return presets
+
+
+def save_presets(presets, path=PRESETS_PATH):
+    # Written to a temp file first so a crash never leaves half a file
+    temp = f"{path}.tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump({name: log_filter.to_dict() for name, log_filter in presets.items()}, f, indent=2)
+    os.replace(temp, path)
@@ -0,0 +1,72 @@
+# app/storage/spill.py
+import threading
+from pathlib import Path
+
+from storage.database import connect
+from utils.constants import SPILL_MAX_LINES
+
+SPILL_DB_PATH = Path("logsentinel_spill.db")
+
+
+class SpillQueue:
+    """FIFO of (line, source) on disk for lines the in-memory hand-off has
+    no room for. The ingest thread appends, the UI thread pops; both go
+    through one connection behind a lock. Like the in-memory queue it only
+    lives for one session and is drained when the app exits, for at most
+    CLOSE_DRAIN_SECONDS; rows left by then, or by a run that crashed, are
+    discarded.
+    """
+
+    def __init__(self, db_path=SPILL_DB_PATH, max_lines=SPILL_MAX_LINES):
+        self.db_path = db_path
+        self.max_lines = max_lines
+        self.conn = connect(db_path)
+        self.lock = threading.Lock()
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS spill (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                line TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("DELETE FROM spill")
+        self.conn.commit()
+        self.depth = 0
+
+    def push_many(self, lines, source):
+        # Returns how many lines were stored; the rest did not fit under max_lines
+        with self.lock:
+            room = self.max_lines - self.depth
+            if room <= 0:
+                return 0
+            if len(lines) > room:
+                lines = lines[:room]
+            self.conn.executemany("INSERT INTO spill (source, line) VALUES (?, ?)",
+                                  [(source, line) for line in lines])
+            self.conn.commit()
+            self.depth += len(lines)
+            return len(lines)
+
+    def pop(self, limit):
+        # Oldest ``limit`` rows as (line, source)
+        with self.lock:
+            if not self.depth:
+                return []
+            rows = self.conn.execute(
+                "SELECT id, line, source FROM spill ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+            if rows:
+                self.conn.execute("DELETE FROM spill WHERE id <= ?", (rows[-1][0],))
+                self.conn.commit()
+            self.depth -= len(rows)
+            return [(line, source) for _, line, source in rows]
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM spill")
+            self.conn.commit()
+            self.depth = 0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
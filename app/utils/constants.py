@@ -2,9 +2,102 @@
 
 LOG_LEVELS = ["INFO", "WARNING", "ERROR", "CRITICAL"]
 
+# Other spellings of the levels (matched case-insensitively where a format
+# marks the level explicitly, e.g. "[warn]" or {"level": "error"})
+LEVEL_ALIASES = {
+    "INFORMATION": "INFO",
+    "NOTICE": "INFO",
+    "WARN": "WARNING",
+    "ERR": "ERROR",
+    "CRIT": "CRITICAL",
+    "FATAL": "CRITICAL",
+    "ALERT": "CRITICAL",
+    "EMERG": "CRITICAL",
+}
+
+# Alert when a level occurs this many times within ALERT_WINDOW seconds
 ALERT_THRESHOLDS = {
     "ERROR": 2,
     "CRITICAL": 1
 }
+ALERT_WINDOW = 60.0       # seconds
+ALERT_BUCKETS = 60        # rolling buckets per window
+ALERT_COOLDOWN = 60.0     # minimum seconds between alerts for the same level
+ALERT_RESET_RATIO = 0.5   # incident ends when the rate falls to this share of the threshold
+ALERT_PER_FILE = False    # track each file separately
+
+# Extra log formats, tried before the built-in ones when a file is first
+# read. Same keys as core/formats.py BUILTIN_FORMATS, e.g.
+# {"name": "myapp", "type": "regex", "pattern": r"(?P<level>\w+) \| (?P<message>.*)"}
+LOG_FORMATS = []
+FORMAT_SAMPLE_LINES = 20  # lines from the start of a file used to pick its format
 
 POLL_INTERVAL = 0.5  # seconds
+HISTORY_LINES = 50   # lines replayed from the end of each file on attach
+CHECKPOINTS_ENABLED = True  # resume each file where the last session stopped
+CHECKPOINT_INTERVAL = 5.0   # seconds between saved read positions
+
+# Log store / viewer
+STORE_CAPACITY = 200_000  # lines retained in memory (ring buffer)
+MAX_VIEW_LINES = 5000  # oldest lines are trimmed from the viewer past this cap
+
+# Network receivers, e.g. ["udp://127.0.0.1:5514", "tcp://127.0.0.1:5514",
+# "unix:///tmp/logsentinel.sock", "unixgram:///tmp/logsentinel.dgram"]
+RECEIVERS = []
+RECEIVER_QUEUE_SIZE = 128        # batches buffered between sources and the hand-off
+MAX_MESSAGE_SIZE = 64 * 1024     # longer stream messages are cut at this many bytes
+INGEST_MAX_DEPTH = 200_000       # hand-off queue size past which OVERFLOW_POLICY applies
+# What happens when the hand-off queue is full:
+#   "block"      sources stop reading until the UI catches up (UDP is still dropped)
+#   "drop_info"  lines without a warning/error are dropped; errors are always kept
+#   "sample"     one line in OVERFLOW_SAMPLE_EVERY is kept
+#   "spill"      lines go to an on-disk queue and are processed once there is room
+OVERFLOW_POLICY = "block"
+OVERFLOW_SAMPLE_EVERY = 10
+SPILL_MAX_LINES = 5_000_000      # lines kept on disk by "spill"; further lines are dropped
+CLOSE_DRAIN_SECONDS = 3.0        # time spent processing queued lines on close or a new file selection
+
+# Monitor -> UI hand-off
+UI_TICK_MS = 75          # how often the UI drains the ingest queue
+MAX_BATCH_SIZE = 20000   # upper bound on lines processed per tick
+CHART_MAX_FPS = 4         # chart redraws per second, at most
+
+# Merged timeline: with several sources, lines are shown in timestamp order
+MERGE_TIMELINE = True
+REORDER_WINDOW = 1.0          # seconds a live line waits for earlier lines from other sources
+REORDER_MAX_LINES = 100_000   # lines held at most; the earliest are released past this
+
+# Message templates (collapsed "xN" view)
+TEMPLATES_ENABLED = True
+TEMPLATE_DEPTH = 4            # parse tree depth; routes on the first DEPTH-2 tokens
+TEMPLATE_SIMILARITY = 0.5     # share of tokens that must match to join a template
+TEMPLATE_MAX_CHILDREN = 100   # per tree node, then new tokens share a wildcard branch
+TEMPLATE_CAPACITY = 5000      # templates kept; least recently seen are evicted
+TEMPLATE_REFRESH_MS = 1000    # collapsed view redraws at most this often
+
+# Trend rollups: (bucket seconds, buckets kept) per resolution, finest first
+ROLLUP_TIERS = (
+    (1, 3600),      # 1 s for the last hour
+    (60, 1440),     # 1 min for the last day
+    (3600, 720),    # 1 h for the last 30 days
+)
+TREND_MAX_POINTS = 2000     # buckets plotted per level, after downsampling
+TREND_REFRESH_MS = 1000
+
+# Storage
+ALERT_RETENTION_DAYS = 30   # older alerts are pruned; 0 keeps everything
+DB_BATCH_SIZE = 500         # rows per executemany
+DB_FLUSH_INTERVAL = 1.0     # seconds the writer waits for new rows
+HISTORY_ENABLED = False     # keep every parsed line in a searchable SQLite history
+HISTORY_BATCH_SIZE = 5000
+
+# Bulk import of archived logs
+BULK_CHUNK_SIZE = 8 * 1024 * 1024  # bytes per parse task
+BULK_WORKERS = None                # None = one process per CPU
+BULK_UI_SLICE = 5000               # imported rows queued per hand-off to the UI
+BULK_TICK_BUDGET_MS = 30           # UI time per tick spent merging imported slices
+
+# Self-profiling
+METRICS_ENABLED = False         # instrumentation on at startup (toggle in the status bar)
+METRICS_DUMP_PATH = None        # e.g. "logsentinel_metrics.ndjson"; appended periodically
+METRICS_DUMP_INTERVAL = 10.0    # seconds
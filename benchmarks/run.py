@@ -0,0 +1,233 @@
+# benchmarks/run.py
+# Headless performance suite for the hot path. Results are printed as a
+# table and written as JSON so runs from different versions can be diffed.
+#
+#   python benchmarks/run.py                        # 10k / 100k / 1M lines
+#   python benchmarks/run.py --sizes 10000 -o new.json --compare old.json
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "app"))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import generate_lines  # noqa: E402
+from core.async_ingest import AsyncIngest  # noqa: E402
+from core.monitor import create_backend  # noqa: E402
+from core.parser import parse_log_line, parse_many  # noqa: E402
+from core.pipeline import Pipeline  # noqa: E402
+from core.store import LogStore  # noqa: E402
+from utils.constants import MAX_VIEW_LINES  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+UI_BATCH = 1000  # lines per simulated UI tick
+
+
+def _best(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def bench_parser(lines, repeat):
+    single = _best(lambda: [parse_log_line(line) for line in lines], repeat)
+    bulk = _best(lambda: parse_many(lines), repeat)
+    return {
+        "parse_log_line_lines_per_s": len(lines) / single,
+        "parse_many_lines_per_s": len(lines) / bulk,
+    }
+
+
+def bench_ui_batch(lines, repeat):
+    # What one UI tick costs once ``len(lines)`` lines are already retained:
+    # pipeline (parse, store, count, detect), viewer entries, chart counts,
+    # and a filter-change rebuild of the viewer
+    store = LogStore(capacity=len(lines) + UI_BATCH)
+    pipeline = Pipeline(store=store)
+    filepath = "/var/log/app.log"
+    pipeline.process([(line, filepath) for line in lines])
+
+    batch = [(line, filepath) for line in lines[:UI_BATCH]]
+
+    def tick():
+        accepted, _ = pipeline.process(batch)
+        [store.entry(index) for _, _, index in accepted]
+        store.counts({"ERROR", "CRITICAL"})
+
+    tick_time = _best(tick, repeat)
+    rebuild_time = _best(lambda: store.tail(MAX_VIEW_LINES, {"ERROR", "WARNING"}), repeat)
+    return {
+        "batch_ms": tick_time * 1000,
+        "batch_lines_per_s": UI_BATCH / tick_time,
+        "filter_rebuild_ms": rebuild_time * 1000,
+    }
+
+
+def bench_memory(lines):
+    store = LogStore(capacity=len(lines))
+    file_id = store.file_id("/var/log/app.log")
+    records = [(line, record.level) for line, record in zip(lines, parse_many(lines)) if record]
+    del lines
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for line, level in records:
+        store.append(line, level, file_id)
+    columns = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    # The line strings already exist (they are shared, not copied) and the
+    # columns are preallocated before tracing starts, so both are added back
+    line_bytes = sum(sys.getsizeof(line) for line, _ in records)
+    fixed = sys.getsizeof(store.lines) + len(store.levels) + store.files.itemsize * len(store.files) \
+        + store.times.itemsize * len(store.times) + len(store.visible)
+    retained = len(records) or 1
+    return {
+        "retained_lines": len(records),
+        "bytes_per_line_columns": (fixed + columns) / retained,
+        "bytes_per_line_total": (fixed + columns + line_bytes) / retained,
+    }
+
+
+def bench_tail_latency(samples=200):
+    # Append lines to a watched file and time write -> hand-off to the sink
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "latency.log")
+        open(path, "w").close()
+
+        arrived = {}
+        done = threading.Event()
+
+        class Sink:
+            should_wait = False
+
+            def push_many(self, lines, _):
+                now = time.perf_counter()
+                for line in lines:
+                    arrived[line] = now
+                if len(arrived) >= samples:
+                    done.set()
+
+        probe = create_backend([path])
+        backend = type(probe).__name__
+        probe.close()
+
+        source = AsyncIngest(Sink(), [path], history_lines=0)
+        source.start()
+        time.sleep(0.1)  # let it open and position the file
+
+        sent = {}
+        with open(path, "a", buffering=1) as f:
+            for i in range(samples):
+                line = f"[INFO] latency probe {i}"
+                sent[line] = time.perf_counter()
+                f.write(line + "\n")
+                time.sleep(0.002)
+        done.wait(10)
+        source.stop()
+        source.join(2)
+
+    delays = [(arrived[line] - sent[line]) * 1000 for line in sent if line in arrived]
+    return {
+        "backend": backend,
+        "samples": len(delays),
+        "p50_ms": _percentile(delays, 50) if delays else None,
+        "p95_ms": _percentile(delays, 95) if delays else None,
+        "max_ms": max(delays) if delays else None,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, repeat):
+    results = {
+        "meta": {
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "sizes": {},
+        "tail_latency": bench_tail_latency(),
+    }
+    for size in sizes:
+        lines = generate_lines(size)
+        results["sizes"][str(size)] = {
+            "parser": bench_parser(lines, repeat),
+            "ui_batch": bench_ui_batch(lines, repeat),
+            "memory": bench_memory(lines),
+        }
+    return results
+
+
+def _flatten(results):
+    flat = {}
+    for size, groups in results["sizes"].items():
+        for group, values in groups.items():
+            for name, value in values.items():
+                flat[f"{size}.{group}.{name}"] = value
+    for name, value in results["tail_latency"].items():
+        flat[f"tail_latency.{name}"] = value
+    return flat
+
+
+def print_table(results, baseline=None):
+    current = _flatten(results)
+    previous = _flatten(baseline) if baseline else {}
+    for key, value in current.items():
+        if not isinstance(value, (int, float)):
+            print(f"{key:<48} {value}")
+            continue
+        line = f"{key:<48} {value:>16,.2f}"
+        old = previous.get(key)
+        if isinstance(old, (int, float)) and old:
+            line += f"   ({value / old:.2f}x vs baseline)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LogSentinel performance benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="write JSON results here")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_table(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
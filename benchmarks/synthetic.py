@@ -0,0 +1,159 @@
+# benchmarks/synthetic.py
+# Deterministic synthetic log generator: the text parser's line shapes, or
+# JSON, logfmt and access-log lines, each mixed with noise (stack traces,
+# banners) the parser must reject or hand to its fallback.
+#
+#   python benchmarks/synthetic.py out.log --lines 100000 [--seed 7] [--format json]
+import argparse
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+LEVELS = ["INFO", "WARNING", "ERROR", "CRITICAL"]
+LEVEL_WEIGHTS = [70, 18, 10, 2]
+
+# Share of each shape in the output
+SHAPES = {
+    "timestamped": 0.40,  # 2026-01-02 18:40:01 [ERROR] message
+    "bracketed": 0.25,    # [ERROR] message
+    "plain": 0.20,        # ERROR message
+    "noise": 0.15,        # stack traces, blank-ish lines, unknown levels
+}
+
+MESSAGES = [
+    "request {id} handled in {ms}ms",
+    "user {user} logged in from 10.0.{a}.{b}",
+    "cache miss for key session:{id}",
+    "database connection pool exhausted ({n} waiting)",
+    "payment {id} declined by gateway",
+    "disk usage at {pct}% on /var",
+    "retrying job {id} (attempt {n})",
+    "worker {n} restarted after {ms}ms",
+]
+
+# Share of noise lines in the structured formats
+STRUCTURED_NOISE = 0.10
+
+# Levels as structured loggers spell them; JSON lines also use pino's
+# numeric levels for part of the records
+STRUCTURED_LEVELS = {"INFO": "info", "WARNING": "warn", "ERROR": "error", "CRITICAL": "fatal"}
+NUMERIC_LEVELS = {"INFO": 30, "WARNING": 40, "ERROR": 50, "CRITICAL": 60}
+
+# Access-log status codes by level (the format maps 4xx/5xx to levels)
+STATUSES = {"INFO": (200, 201, 204, 301, 304), "WARNING": (400, 401, 403, 404),
+            "ERROR": (500, 502, 503), "CRITICAL": (504,)}
+REQUESTS = [
+    "GET /api/orders/{id} HTTP/1.1",
+    "POST /api/payments HTTP/1.1",
+    "GET /static/app.{id}.js HTTP/2.0",
+    "GET /healthz HTTP/1.1",
+    "PUT /api/users/u{id}/settings HTTP/1.1",
+]
+
+NOISE = [
+    "    at com.example.Service.handle(Service.java:{n})",
+    "Traceback (most recent call last):",
+    '  File "/srv/app/handlers.py", line {n}, in dispatch',
+    "---- request {id} ----",
+    "DEBUG verbose state dump {id}",
+    "",
+]
+
+
+def _message(rng, i):
+    return rng.choice(MESSAGES).format(
+        id=i, ms=rng.randint(1, 5000), user=f"u{rng.randint(1, 9999)}",
+        a=rng.randint(0, 255), b=rng.randint(0, 255), n=rng.randint(1, 64),
+        pct=rng.randint(50, 99),
+    )
+
+
+def _level(rng):
+    return rng.choices(LEVELS, LEVEL_WEIGHTS)[0]
+
+
+def _text_line(rng, i, when):
+    shape = rng.choices(list(SHAPES), list(SHAPES.values()))[0]
+    level = _level(rng)
+    if shape == "timestamped":
+        return f"{when:%Y-%m-%d %H:%M:%S} [{level}] {_message(rng, i)}"
+    if shape == "bracketed":
+        return f"[{level}] {_message(rng, i)}"
+    if shape == "plain":
+        return f"{level} {_message(rng, i)}"
+    return None
+
+
+def _json_line(rng, i, when):
+    level = _level(rng)
+    if rng.random() < 0.3:
+        # pino / bunyan: epoch milliseconds and numeric levels
+        record = {"level": NUMERIC_LEVELS[level], "time": int(when.timestamp() * 1000),
+                  "pid": 4242, "msg": _message(rng, i)}
+    else:
+        record = {"timestamp": f"{when:%Y-%m-%dT%H:%M:%S.%f}"[:-3] + "Z",
+                  "level": STRUCTURED_LEVELS[level], "message": _message(rng, i),
+                  "request_id": f"r{i}", "service": "api"}
+    return json.dumps(record)
+
+
+def _logfmt_line(rng, i, when):
+    level = _level(rng)
+    message = _message(rng, i).replace('"', '\\"')
+    return (f'ts={when:%Y-%m-%dT%H:%M:%S}Z level={STRUCTURED_LEVELS[level]} '
+            f'msg="{message}" request_id=r{i} duration_ms={rng.randint(1, 5000)}')
+
+
+def _access_line(rng, i, when):
+    level = _level(rng)
+    request = rng.choice(REQUESTS).format(id=i)
+    status = rng.choice(STATUSES[level])
+    return (f'10.0.{rng.randint(0, 255)}.{rng.randint(0, 255)} - - '
+            f'[{when.replace(tzinfo=timezone.utc):%d/%b/%Y:%H:%M:%S %z}] "{request}" '
+            f'{status} {rng.randint(0, 90000)} "-" "curl/8.{rng.randint(0, 9)}.0"')
+
+
+# Line builder per format name (formats.py names); None from a builder
+# means "emit noise instead"
+FORMATS = {
+    "text": _text_line,
+    "json": _json_line,
+    "logfmt": _logfmt_line,
+    "access-log": _access_line,
+}
+
+
+def generate_lines(count, seed=1234, start=datetime(2026, 1, 2, 18, 0, 0), fmt="text"):
+    build = FORMATS[fmt]
+    rng = random.Random(seed)
+    when = start
+    lines = []
+    for i in range(count):
+        when += timedelta(milliseconds=rng.randint(0, 40))
+        line = None
+        if fmt == "text" or rng.random() >= STRUCTURED_NOISE:
+            line = build(rng, i, when)
+        if line is None:
+            line = rng.choice(NOISE).format(id=i, n=rng.randint(1, 900))
+        lines.append(line)
+    return lines
+
+
+def write_log(path, count, seed=1234, fmt="text"):
+    with open(path, "w", encoding="utf-8") as f:
+        for line in generate_lines(count, seed, fmt=fmt):
+            f.write(line + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic log file.")
+    parser.add_argument("path")
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--format", choices=list(FORMATS), default="text")
+    args = parser.parse_args()
+    write_log(args.path, args.lines, args.seed, args.format)
+
+
+if __name__ == "__main__":
+    main()